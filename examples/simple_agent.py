@@ -3,34 +3,155 @@
 演示如何使用 create_deep_agent 创建一个基本的 Agent
 """
 
+import asyncio
+import logging
 import os
+import sys
+
+import httpx
+import openai
+from langchain_core.caches import InMemoryCache
+from langchain_core.globals import set_llm_cache
 from langchain_openai import ChatOpenAI
-from langgraph.checkpoint.memory import MemorySaver
 
-from my_deepagents import create_deep_agent
+try:
+    from prompt_toolkit import PromptSession
+except ImportError:  # prompt_toolkit 是可选依赖
+    PromptSession = None
+
+from my_deepagents import PrefixCacheSaver, create_deep_agent
+from my_deepagents.graph import ROLE_USER
+from my_deepagents.http_client import create_async_client
 
 
 # 配置 API
 API_KEY = os.getenv("OPENAI_API_KEY", "sk-xxxxx")
 API_BASE = os.getenv("OPENAI_API_BASE", "https://bmc-llm-relay.bluemediagroup.cn/v1")
 
+# 系统提示词保持为静态常量（不插入时间戳等动态内容），
+# 每轮请求的前缀逐字节一致，才能命中服务端的 prompt 缓存；
+# 动态内容只随新消息追加在消息列表末尾
+SYSTEM_PROMPT = "你是一个友好、专业的助手，可以帮助用户完成各种任务。"
+
+# 响应缓存：相同的（消息 + 模型参数）直接返回上次的结果，调试/重放时不再请求 API
+# 需要跨进程复用可换成 langchain_community.cache.SQLiteCache(".llm_cache.sqlite")
+set_llm_cache(InMemoryCache())
+
+# 连接池中空闲连接的保持时间（秒）；空闲不超过这个时间时连接仍然可用，无需预热
+KEEPALIVE_EXPIRY = 30.0
+
+logger = logging.getLogger(__name__)
+
+
+async def prewarm(model):
+    """预热到 API 服务的连接
+
+    用户思考期间，上一轮的 keep-alive 连接通常已经过期，下一次请求要重新握手。
+    在用户开始输入时发一个幂等的轻量请求（列出模型），
+    让连接池里提前准备好连接；请求失败（如服务不支持该接口）只记录日志，不影响对话
+    """
+    try:
+        await model.root_async_client.models.list()
+    except (openai.APIError, httpx.HTTPError) as e:
+        logger.debug("预热连接失败: %s", e)
+
 
-def main():
+async def chat_loop(agent, config, on_typing=None, warm_after=0.0):
+    """交互循环
+
+    输入和 agent 调用都是异步的（astream_events 流式输出），等待用户输入期间
+    事件循环仍可执行其他任务。优先使用 prompt_toolkit 的异步会话，
+    未安装时退回到线程池中执行 input()
+
+    on_typing: 每轮用户开始输入时（无 prompt_toolkit 时为提示出现时）
+    在后台执行一次的协程函数，用于提前完成下一轮请求需要的准备工作；
+    距上一轮请求结束不足 warm_after 秒时跳过
+    """
+    session = PromptSession() if PromptSession is not None else None
+    loop = asyncio.get_running_loop()
+    warm_task = None
+    last_request = None
+
+    def start_warm(_=None):
+        nonlocal warm_task
+        if on_typing is None or warm_task is not None:
+            return
+        if last_request is not None and loop.time() - last_request < warm_after:
+            return
+        warm_task = asyncio.ensure_future(on_typing())
+
+    if session is not None:
+        # 首次按键时触发，之后同一轮内不再重复
+        session.default_buffer.on_text_changed += start_warm
+
+    while True:
+        warm_task = None
+        if session is not None:
+            user_input = await session.prompt_async("\n你: ")
+        else:
+            start_warm()
+            user_input = await loop.run_in_executor(None, input, "\n你: ")
+        user_input = user_input.strip()
+        if user_input.lower() in ("quit", "exit", "q"):
+            if warm_task is not None:
+                warm_task.cancel()
+            print("再见！")
+            break
+        
+        if not user_input:
+            continue
+        
+        # 流式调用 Agent，逐个输出模型生成的 token
+        sys.stdout.write("\n助手: ")
+        streamed = False
+        async for ev in agent.astream_events(
+            {"messages": [{"role": ROLE_USER, "content": user_input}]},
+            config=config,
+            version="v2",
+        ):
+            # 只输出主 Agent 模型节点的 token（跳过摘要等中间件内部的模型调用）
+            if ev.get("metadata", {}).get("langgraph_node") != "model":
+                continue
+            if ev["event"] == "on_chat_model_start":
+                streamed = False
+            elif ev["event"] == "on_chat_model_stream":
+                content = ev["data"]["chunk"].content
+                if isinstance(content, str) and content:
+                    streamed = True
+                    sys.stdout.write(content)
+                    sys.stdout.flush()
+            elif ev["event"] == "on_chat_model_end" and not streamed:
+                # 命中响应缓存时没有逐 token 事件，直接输出完整回复
+                content = ev["data"]["output"].content
+                if isinstance(content, str) and content:
+                    sys.stdout.write(content)
+                    sys.stdout.flush()
+        sys.stdout.write("\n")
+        last_request = loop.time()
+
+
+async def main():
     # 1. 创建模型
+    # 整个进程共享一个连接池，复用 TLS 连接（安装了 h2 时启用 HTTP/2 多路复用）
+    http_client = create_async_client(max_keepalive_connections=64, keepalive_expiry=KEEPALIVE_EXPIRY)
     model = ChatOpenAI(
         model="gpt-4o-mini",
         api_key=API_KEY,
         base_url=API_BASE,
         max_tokens=2000,
+        temperature=0,  # 确定性输出，提高缓存命中的意义
+        streaming=True,
+        http_async_client=http_client,
     )
     
     # 2. 创建检查点（用于会话持久化）
-    checkpointer = MemorySaver()
+    # PrefixCacheSaver 按前缀哈希链存储消息，历史消息在各检查点之间只存一份
+    checkpointer = PrefixCacheSaver()
     
     # 3. 创建 Agent
     agent = create_deep_agent(
         model=model,
-        system_prompt="你是一个友好、专业的助手，可以帮助用户完成各种任务。",
+        system_prompt=SYSTEM_PROMPT,
         checkpointer=checkpointer,
     )
     
@@ -43,25 +164,19 @@ def main():
     print("输入 'quit' 退出")
     print("=" * 50)
     
-    while True:
-        user_input = input("\n你: ").strip()
-        if user_input.lower() in ("quit", "exit", "q"):
-            print("再见！")
-            break
-        
-        if not user_input:
-            continue
-        
-        # 调用 Agent
-        result = agent.invoke(
-            {"messages": [{"role": "user", "content": user_input}]},
-            config=config,
-        )
-        
-        # 输出响应
-        response = result["messages"][-1].content
-        print(f"\n助手: {response}")
+    try:
+        await chat_loop(agent, config, on_typing=lambda: prewarm(model), warm_after=KEEPALIVE_EXPIRY)
+    finally:
+        await http_client.aclose()
 
 
 if __name__ == "__main__":
-    main()
+    # uvloop（基于 libuv）调度更快，可选依赖；Windows 不支持
+    if sys.platform != "win32":
+        try:
+            import uvloop
+        except ImportError:
+            pass
+        else:
+            uvloop.install()
+    asyncio.run(main())
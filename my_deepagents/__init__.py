@@ -3,25 +3,69 @@
 通过复刻 DeepAgents 学习 LangChain 与 LangGraph
 """
 
-from my_deepagents.backends.protocol import BackendFactory, BackendProtocol
-from my_deepagents.backends.state import StateBackend
-from my_deepagents.graph import create_deep_agent, get_default_model
-from my_deepagents.middleware.filesystem import FilesystemMiddleware, FilesystemState
-from my_deepagents.middleware.patch_tool_calls import PatchToolCallsMiddleware
-from my_deepagents.middleware.subagents import (
-    CompiledSubAgent,
-    SubAgent,
-    SubAgentMiddleware,
-)
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from my_deepagents.backends.protocol import BackendFactory, BackendProtocol
+    from my_deepagents.backends.state import StateBackend
+    from my_deepagents.checkpoint import PrefixCacheSaver, TieredCheckpointer
+    from my_deepagents.graph import (
+        arun_batch,
+        create_deep_agent,
+        create_deep_agent_cached,
+        get_default_model,
+    )
+    from my_deepagents.http_client import create_async_client
+    from my_deepagents.middleware.filesystem import FilesystemMiddleware, FilesystemState
+    from my_deepagents.middleware.patch_tool_calls import PatchToolCallsMiddleware
+    from my_deepagents.middleware.subagents import (
+        CompiledSubAgent,
+        SubAgent,
+        SubAgentMiddleware,
+    )
+
+# 名称 -> 所在模块，首次访问时才导入（PEP 562）
+# 避免 import my_deepagents 时就加载 langgraph/langchain 等重量级依赖
+_LAZY = {
+    # 核心入口
+    "create_deep_agent": "my_deepagents.graph",
+    "create_deep_agent_cached": "my_deepagents.graph",
+    "get_default_model": "my_deepagents.graph",
+    "arun_batch": "my_deepagents.graph",
+    # 后端
+    "BackendProtocol": "my_deepagents.backends.protocol",
+    "BackendFactory": "my_deepagents.backends.protocol",
+    "StateBackend": "my_deepagents.backends.state",
+    # 检查点
+    "PrefixCacheSaver": "my_deepagents.checkpoint",
+    "TieredCheckpointer": "my_deepagents.checkpoint",
+    # 模型调用
+    "create_async_client": "my_deepagents.http_client",
+    # 中间件
+    "FilesystemMiddleware": "my_deepagents.middleware.filesystem",
+    "FilesystemState": "my_deepagents.middleware.filesystem",
+    "PatchToolCallsMiddleware": "my_deepagents.middleware.patch_tool_calls",
+    "SubAgentMiddleware": "my_deepagents.middleware.subagents",
+    "SubAgent": "my_deepagents.middleware.subagents",
+    "CompiledSubAgent": "my_deepagents.middleware.subagents",
+}
 
 __all__ = [
     # 核心入口
     "create_deep_agent",
+    "create_deep_agent_cached",
     "get_default_model",
+    "arun_batch",
     # 后端
     "BackendProtocol",
     "BackendFactory",
     "StateBackend",
+    # 检查点
+    "PrefixCacheSaver",
+    "TieredCheckpointer",
+    # 模型调用
+    "create_async_client",
     # 中间件
     "FilesystemMiddleware",
     "FilesystemState",
@@ -30,3 +74,17 @@ __all__ = [
     "SubAgent",
     "CompiledSubAgent",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    """按需导入并缓存到模块全局，之后的访问不再经过这里"""
+    if name not in _LAZY:
+        msg = f"module {__name__!r} has no attribute {name!r}"
+        raise AttributeError(msg)
+    value = getattr(importlib.import_module(_LAZY[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *__all__])
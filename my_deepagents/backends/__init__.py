@@ -1,21 +1,43 @@
 """Backends package - 后端系统，处理文件存储和操作"""
 
-from my_deepagents.backends.filesystem import FilesystemBackend
-from my_deepagents.backends.protocol import (
-    BackendFactory,
-    BackendProtocol,
-    EditResult,
-    ExecuteResponse,
-    FileDownloadResponse,
-    FileInfo,
-    FileOperationError,
-    FileUploadResponse,
-    GrepMatch,
-    SandboxBackendProtocol,
-    WriteResult,
-)
-from my_deepagents.backends.state import StateBackend
-from my_deepagents.backends.store import StoreBackend
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from my_deepagents.backends.filesystem import FilesystemBackend
+    from my_deepagents.backends.protocol import (
+        BackendFactory,
+        BackendProtocol,
+        EditResult,
+        ExecuteResponse,
+        FileDownloadResponse,
+        FileInfo,
+        FileOperationError,
+        FileUploadResponse,
+        GrepMatch,
+        SandboxBackendProtocol,
+        WriteResult,
+    )
+    from my_deepagents.backends.state import StateBackend
+    from my_deepagents.backends.store import StoreBackend
+
+# 名称 -> 所在模块，首次访问时才导入（PEP 562）
+_LAZY = {
+    "BackendFactory": "my_deepagents.backends.protocol",
+    "BackendProtocol": "my_deepagents.backends.protocol",
+    "EditResult": "my_deepagents.backends.protocol",
+    "ExecuteResponse": "my_deepagents.backends.protocol",
+    "FileDownloadResponse": "my_deepagents.backends.protocol",
+    "FileInfo": "my_deepagents.backends.protocol",
+    "FileOperationError": "my_deepagents.backends.protocol",
+    "FilesystemBackend": "my_deepagents.backends.filesystem",
+    "FileUploadResponse": "my_deepagents.backends.protocol",
+    "GrepMatch": "my_deepagents.backends.protocol",
+    "SandboxBackendProtocol": "my_deepagents.backends.protocol",
+    "StateBackend": "my_deepagents.backends.state",
+    "StoreBackend": "my_deepagents.backends.store",
+    "WriteResult": "my_deepagents.backends.protocol",
+}
 
 __all__ = [
     "BackendFactory",
@@ -33,3 +55,17 @@ __all__ = [
     "StoreBackend",
     "WriteResult",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    """按需导入并缓存到模块全局"""
+    if name not in _LAZY:
+        msg = f"module {__name__!r} has no attribute {name!r}"
+        raise AttributeError(msg)
+    value = getattr(importlib.import_module(_LAZY[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *__all__])
@@ -1,6 +1,14 @@
 """CompositeBackend: Route operations to different backends based on path prefix."""
 
-from collections import defaultdict
+import contextvars
+import heapq
+import sys
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from operator import itemgetter
+from typing import NamedTuple, TypeVar
 
 from my_deepagents.backends.protocol import (
     BackendProtocol,
@@ -13,8 +21,75 @@ from my_deepagents.backends.protocol import (
     SandboxBackendProtocol,
     WriteResult,
 )
+from my_deepagents.backends.filesystem import FilesystemBackend
 from my_deepagents.backends.state import StateBackend
 
+_T = TypeVar("_T")
+
+# 跨后端聚合查询共用的线程池：后端调用多为 I/O（磁盘、远程存储），
+# 线程足以重叠等待。进程内共享一个，避免每个 CompositeBackend 实例各建一个
+_FANOUT_MAX_WORKERS = 8
+_fanout_executor: ThreadPoolExecutor | None = None
+_fanout_lock = threading.Lock()
+# 标记当前线程是否为共享线程池的工作线程
+_fanout_local = threading.local()
+
+
+def _mark_fanout_worker() -> None:
+    """线程池 initializer：标记工作线程"""
+    _fanout_local.in_pool = True
+
+
+def _get_fanout_executor() -> ThreadPoolExecutor:
+    """获取（首次调用时创建）共享线程池"""
+    global _fanout_executor
+    if _fanout_executor is None:
+        with _fanout_lock:
+            if _fanout_executor is None:
+                _fanout_executor = ThreadPoolExecutor(
+                    max_workers=_FANOUT_MAX_WORKERS,
+                    thread_name_prefix="composite-backend",
+                    initializer=_mark_fanout_worker,
+                )
+    return _fanout_executor
+
+
+def _fan_out(calls: list[Callable[[], _T]]) -> list[_T]:
+    """并发执行多个后端调用，结果顺序与 calls 一致
+
+    第一个调用在当前线程执行，其余提交到线程池；
+    每个任务复制当前 contextvars 上下文（StoreBackend 依赖 get_config() 获取命名空间）。
+    已经在线程池工作线程中时（嵌套的 CompositeBackend）直接串行执行，
+    避免工作线程阻塞等待同一个线程池而死锁
+    """
+    if len(calls) <= 1 or getattr(_fanout_local, "in_pool", False):
+        return [call() for call in calls]
+    executor = _get_fanout_executor()
+    futures = [executor.submit(contextvars.copy_context().run, call) for call in calls[1:]]
+    first = calls[0]()
+    return [first, *(future.result() for future in futures)]
+
+
+class _Route(NamedTuple):
+    """一条路由及其预先计算好的前缀变体，避免每次请求重复切片/rstrip"""
+
+    prefix: str  # 原始前缀，如 "/memories/"
+    stripped: str  # 去掉结尾斜杠，如 "/memories"（用于匹配目录本身）
+    noslash: str  # 去掉最后一个字符，拼接到后端返回的路径前面
+    plen: int  # 前缀长度，用于切出后端路径
+    backend: BackendProtocol
+
+
+class _RouteTrieNode:
+    """路由前缀树节点，每一层对应路径中的一段"""
+
+    __slots__ = ("children", "route")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _RouteTrieNode] = {}
+        # 恰好在此节点结束的路由
+        self.route: _Route | None = None
+
 
 class CompositeBackend:
     """根据路径前缀将操作路由到不同后端的后端.
@@ -46,16 +121,86 @@ class CompositeBackend:
             routes: Dict mapping path prefixes to backends.                                                                                              
                     Prefixes should end with '/', e.g., "/memories/".                                                                                    
         """                                                                                                                                             
-        # 默认后端                                                                                                                                       
-        self.default = default                                                                                                                           
-                                                                                                                                                        
-        # 虚拟路由                                                                                                                                       
-        self.routes = routes                                                                                                                             
-                                                                                                                                                        
-        # 按长度排序（最长优先）以确保正确的前缀匹配                                                                                                     
+        # 默认后端
+        self.default = default
+        # 只有 StateBackend 这类基于 runtime state 的后端需要同步，其余为 None
+        self._default_runtime = getattr(default, "runtime", None)
+
+        # 虚拟路由
+        self.routes = routes
+
+        # 按长度排序（最长优先）以确保正确的前缀匹配
         self.sorted_routes = sorted(routes.items(), key=lambda x: len(x[0]), reverse=True)
 
-    def _get_backend_and_key(self, key: str) -> tuple[BackendProtocol, str]:                                                                             
+        # 预先计算每条路由的前缀变体（保持 routes 的插入顺序，用于跨后端聚合）；
+        # noslash 驻留后，每次工具调用新建的 CompositeBackend 都复用同一个字符串对象
+        self._route_table = [
+            _Route(prefix, prefix.rstrip("/"), sys.intern(prefix[:-1]), len(prefix), backend)
+            for prefix, backend in routes.items()
+        ]
+
+        # 所有前缀组成的元组：str.startswith(tuple) 在 C 层一次判断是否可能命中任一路由
+        self._all_prefixes = tuple(route.prefix for route in self._route_table)
+        self._all_stripped_prefixes = tuple(route.stripped for route in self._route_table)
+
+        # 规范的前缀（以 "/" 开头和结尾）按段插入前缀树，匹配只需 O(路径深度)；
+        # 其余前缀无法按段匹配，保留线性扫描
+        self._route_trie = _RouteTrieNode()
+        self._route_trie_depth = 0
+        self._irregular_routes: list[_Route] = []
+        for route in sorted(self._route_table, key=lambda r: len(r.prefix), reverse=True):
+            prefix = route.prefix
+            if not (prefix.startswith("/") and prefix.endswith("/")):
+                self._irregular_routes.append(route)
+                continue
+            segments = prefix[1:-1].split("/") if len(prefix) > 1 else []
+            node = self._route_trie
+            for segment in segments:
+                node = node.children.setdefault(segment, _RouteTrieNode())
+            node.route = route
+            self._route_trie_depth = max(self._route_trie_depth, len(segments))
+
+        # 根目录列表中代表各路由的目录路径（如 /memories/），按路径预先排好序
+        self._route_dir_paths: tuple[str, ...] = tuple(sorted(routes))
+
+    def _match_route(self, path: str, *, allow_bare: bool = False) -> _Route | None:
+        """查找匹配路径的最长路由前缀.
+
+        Args:
+            path: 文件或目录路径
+            allow_bare: 是否允许匹配不带结尾斜杠的路由目录本身
+                （如 "/memories" 匹配路由 "/memories/"），用于 ls/grep/glob 的目录参数
+
+        Returns:
+            匹配的路由，没有匹配时返回 None
+        """
+        # 快速排除：大多数路径属于默认后端，连前缀树都不必进入
+        if not path.startswith(self._all_stripped_prefixes if allow_bare else self._all_prefixes):
+            return None
+
+        best: _Route | None = None
+        if path.startswith("/"):
+            # 只需切分到最深路由的下一段，更深的部分不影响匹配
+            tokens = path.split("/", self._route_trie_depth + 1)
+            node = self._route_trie
+            best = node.route
+            for i in range(1, len(tokens)):
+                node = node.children.get(tokens[i])
+                if node is None:
+                    break
+                # 前缀以 "/" 结尾：该段之后必须还有内容，除非允许匹配目录本身
+                if node.route is not None and (allow_bare or i + 1 < len(tokens)):
+                    best = node.route
+
+        for route in self._irregular_routes:
+            if best is not None and best.plen >= route.plen:
+                break
+            if path.startswith(route.prefix) or (allow_bare and path.startswith(route.stripped)):
+                best = route
+                break
+        return best
+
+    def _get_backend_and_key(self, key: str) -> tuple[BackendProtocol, str]:
         """确定哪个后端处理此路径并去除前缀.                                                                                                             
                                                                                                                                                         
         Args:                                                                                                                                            
@@ -64,17 +209,15 @@ class CompositeBackend:
         Returns:                                                                                                                                         
             (backend, stripped_key) 元组，stripped_key 已去除路由前缀但保留前导斜杠                                                                      
             例如: "/memories/notes.txt" → (MemoriesBackend, "/notes.txt")                                                                                
-                "/memories/" → (MemoriesBackend, "/")                                                                                                   
-        """                                                                                                                                              
-        # 按长度顺序检查路由（最长优先）                                                                                                                 
-        for prefix, backend in self.sorted_routes:                                                                                                       
-            if key.startswith(prefix):                                                                                                                   
-                # 去除完整前缀并确保保留前导斜杠                                                                                                         
-                suffix = key[len(prefix):]                                                                                                               
-                stripped_key = f"/{suffix}" if suffix else "/"                                                                                           
-                return backend, stripped_key                                                                                                             
-                                                                                                                                                        
-        return self.default, key
+                "/memories/" → (MemoriesBackend, "/")
+        """
+        route = self._match_route(key)
+        if route is None:
+            return self.default, key
+        _, _, _, plen, backend = route
+        # 去除完整前缀并确保保留前导斜杠
+        suffix = key[plen:]
+        return backend, "/" + suffix if suffix else "/"
 
     def _sync_state_if_needed(self, files_update: dict | None) -> None:                                                                                  
         """如果有状态更新，同步到默认后端的 state.                                                                                                       
@@ -82,17 +225,15 @@ class CompositeBackend:
         Args:                                                                                                                                            
             files_update: 需要更新的文件数据字典，为 None 则跳过                                                                                         
         """                                                                                                                                              
-        if not files_update:                                                                                                                             
-            return                                                                                                                                       
-        try:                                                                                                                                             
-            runtime = getattr(self.default, "runtime", None)                                                                                             
-            if runtime is not None:                                                                                                                      
-                state = runtime.state                                                                                                                    
-                files = state.get("files", {})                                                                                                           
-                files.update(files_update)                                                                                                               
-                state["files"] = files                                                                                                                   
-        except Exception:                                                                                                                                
-            pass 
+        if not files_update or self._default_runtime is None:
+            return
+        state = self._default_runtime.state
+        files = state.get("files")
+        if files is None:
+            state["files"] = dict(files_update)
+        else:
+            # 原地更新即可，state["files"] 已经指向同一个字典，无需重新赋值
+            files.update(files_update)
 
     def ls_info(self, path: str) -> list[FileInfo]:                                                                                                      
         """列出指定目录中的文件和目录（非递归）.                                                                                                         
@@ -103,37 +244,28 @@ class CompositeBackend:
         Returns:                                                                                                                                         
             FileInfo 列表，路径已添加路由前缀                                                                                                            
         """                                                                                                                                              
-        # 检查路径是否匹配特定路由                                                                                                                       
-        for route_prefix, backend in self.sorted_routes:                                                                                                 
-            if path.startswith(route_prefix.rstrip("/")):                                                                                                
-                # 只查询匹配的路由后端                                                                                                                   
-                suffix = path[len(route_prefix):]                                                                                                        
-                search_path = f"/{suffix}" if suffix else "/"                                                                                            
-                infos = backend.ls_info(search_path)                                                                                                     
-                # 添加路由前缀到结果路径                                                                                                                 
-                prefixed: list[FileInfo] = []                                                                                                            
-                for fi in infos:                                                                                                                         
-                    fi = dict(fi)                                                                                                                        
-                    fi["path"] = f"{route_prefix[:-1]}{fi['path']}"                                                                                      
-                    prefixed.append(fi)                                                                                                                  
-                return prefixed                                                                                                                          
+        # 检查路径是否匹配特定路由
+        route = self._match_route(path, allow_bare=True)
+        if route is not None:
+            _, _, noslash, plen, backend = route
+            # 只查询匹配的路由后端
+            suffix = path[plen:]
+            search_path = "/" + suffix if suffix else "/"
+            # 添加路由前缀到结果路径（每项只构造一次新字典）
+            return [{**fi, "path": noslash + fi["path"]} for fi in backend.ls_info(search_path)]
                                                                                                                                                         
         # 根目录：聚合默认后端和所有路由后端                                                                                                             
-        if path == "/":                                                                                                                                  
-            results: list[FileInfo] = []                                                                                                                 
-            results.extend(self.default.ls_info(path))                                                                                                   
-            for route_prefix, backend in self.sorted_routes:                                                                                             
-                # 将路由本身作为目录添加（如 /memories/）                                                                                                
-                results.append(                                                                                                                          
-                    {                                                                                                                                    
-                        "path": route_prefix,                                                                                                            
-                        "is_dir": True,                                                                                                                  
-                        "size": 0,                                                                                                                       
-                        "modified_at": "",                                                                                                               
-                    }                                                                                                                                    
-                )                                                                                                                                        
-            results.sort(key=lambda x: x.get("path", ""))                                                                                                
-            return results                                                                                                                               
+        if path == "/":
+            results: list[FileInfo] = self.default.ls_info(path)
+            if len(results) > 1:
+                # 各后端返回的列表通常已按路径排序，Timsort 对有序输入只需 O(n)
+                results = sorted(results, key=itemgetter("path"))
+            # 将路由本身作为目录归并进来（如 /memories/），无需整体重新排序；
+            # 每次调用新建目录项，调用方修改返回结果不会影响后续调用
+            route_dirs: list[FileInfo] = [
+                {"path": prefix, "is_dir": True, "size": 0, "modified_at": ""} for prefix in self._route_dir_paths
+            ]
+            return list(heapq.merge(results, route_dirs, key=itemgetter("path")))
                                                                                                                                                         
         # 路径不匹配任何路由：只查询默认后端                                                                                                             
         return self.default.ls_info(path)
@@ -154,12 +286,12 @@ class CompositeBackend:
         Returns:                                                                                                                                         
             带行号的文件内容，或错误信息                                                                                                                 
         """                                                                                                                                              
-        backend, stripped_key = self._get_backend_and_key(file_path)                                                                                     
+        backend, stripped_key = self._get_backend_and_key(file_path)
         return backend.read(stripped_key, offset=offset, limit=limit)
 
     def write(self, file_path: str, content: str) -> WriteResult:                                                                                        
         """创建新文件，路由到对应后端."""                                                                                                                
-        backend, stripped_key = self._get_backend_and_key(file_path)                                                                                     
+        backend, stripped_key = self._get_backend_and_key(file_path)
         res = backend.write(stripped_key, content)                                                                                                       
         self._sync_state_if_needed(res.files_update)                                                                                                     
         return res
@@ -172,7 +304,7 @@ class CompositeBackend:
         replace_all: bool = False,                                                                                                                       
     ) -> EditResult:                                                                                                                                     
         """编辑文件，路由到对应后端."""                                                                                                                  
-        backend, stripped_key = self._get_backend_and_key(file_path)                                                                                     
+        backend, stripped_key = self._get_backend_and_key(file_path)
         res = backend.edit(stripped_key, old_string, new_string, replace_all=replace_all)                                                                
         self._sync_state_if_needed(res.files_update)                                                                                                     
         return res
@@ -193,33 +325,38 @@ class CompositeBackend:
         Returns:                                                                                                                                         
             GrepMatch 列表或错误字符串                                                                                                                   
         """                                                                                                                                              
-        # 如果路径指向特定路由，只搜索该后端                                                                                                             
-        for route_prefix, backend in self.sorted_routes:                                                                                                 
-            if path is not None and path.startswith(route_prefix.rstrip("/")):                                                                           
-                search_path = path[len(route_prefix) - 1:]                                                                                               
-                raw = backend.grep_raw(pattern, search_path if search_path else "/", glob)                                                               
-                if isinstance(raw, str):                                                                                                                 
-                    return raw                                                                                                                           
-                # 添加路由前缀到结果路径                                                                                                                 
-                return [{**m, "path": f"{route_prefix[:-1]}{m['path']}"} for m in raw]                                                                   
-                                                                                                                                                        
-        # 否则，搜索默认后端和所有路由后端并合并                                                                                                         
-        all_matches: list[GrepMatch] = []                                                                                                                
-                                                                                                                                                        
-        # 搜索默认后端                                                                                                                                   
-        raw_default = self.default.grep_raw(pattern, path, glob)                                                                                         
-        if isinstance(raw_default, str):                                                                                                                 
-            return raw_default                                                                                                                           
-        all_matches.extend(raw_default)                                                                                                                  
-                                                                                                                                                        
-        # 搜索所有路由后端                                                                                                                               
-        for route_prefix, backend in self.routes.items():                                                                                                
-            raw = backend.grep_raw(pattern, "/", glob)                                                                                                   
-            if isinstance(raw, str):                                                                                                                     
-                return raw                                                                                                                               
-            all_matches.extend({**m, "path": f"{route_prefix[:-1]}{m['path']}"} for m in raw)                                                            
-                                                                                                                                                        
-        return all_matches
+        # 如果路径指向特定路由，只搜索该后端
+        route = self._match_route(path, allow_bare=True) if path is not None else None
+        if route is not None:
+            _, _, noslash, plen, backend = route
+            search_path = path[plen - 1:]
+            raw = backend.grep_raw(pattern, search_path if search_path else "/", glob)
+            if isinstance(raw, str):
+                return raw
+            # 添加路由前缀到结果路径
+            return [{**m, "path": noslash + m["path"]} for m in raw]
+                                                                                                                                                        
+        # 否则，并发搜索默认后端和所有路由后端并合并
+        raws = _fan_out(
+            [
+                partial(self.default.grep_raw, pattern, path, glob),
+                *(partial(route.backend.grep_raw, pattern, "/", glob) for route in self._route_table),
+            ]
+        )
+
+        # 按默认后端、各路由的顺序返回第一个错误
+        for raw in raws:
+            if isinstance(raw, str):
+                return raw
+
+        # 所有路由后端的结果一次性展开为一个列表（不经过生成器逐项扩容）
+        route_matches = [
+            {**m, "path": noslash + m["path"]}
+            for (_, _, noslash, _, _), raw in zip(self._route_table, raws[1:], strict=True)
+            for m in raw
+        ]
+        # 默认后端的结果在前；列表相加按总长度一次分配
+        return raws[0] + route_matches
 
     def glob_info(self, pattern: str, path: str = "/") -> list[FileInfo]:                                                                                
         """按模式搜索文件，可跨多个后端聚合结果.                                                                                                         
@@ -230,25 +367,31 @@ class CompositeBackend:
                                                                                                                                                         
         Returns:                                                                                                                                         
             匹配的 FileInfo 列表                                                                                                                         
-        """                                                                                                                                              
-        results: list[FileInfo] = []                                                                                                                     
-                                                                                                                                                        
-        # 基于路径路由，而非模式                                                                                                                         
-        for route_prefix, backend in self.sorted_routes:                                                                                                 
-            if path.startswith(route_prefix.rstrip("/")):                                                                                                
-                search_path = path[len(route_prefix) - 1:]                                                                                               
-                infos = backend.glob_info(pattern, search_path if search_path else "/")                                                                  
-                return [{**fi, "path": f"{route_prefix[:-1]}{fi['path']}"} for fi in infos]                                                              
-                                                                                                                                                        
-        # 路径不匹配任何特定路由 - 搜索默认后端和所有路由后端                                                                                            
-        results.extend(self.default.glob_info(pattern, path))                                                                                            
-                                                                                                                                                        
-        for route_prefix, backend in self.routes.items():                                                                                                
-            infos = backend.glob_info(pattern, "/")                                                                                                      
-            results.extend({**fi, "path": f"{route_prefix[:-1]}{fi['path']}"} for fi in infos)                                                           
+        """
+        # 基于路径路由，而非模式
+        route = self._match_route(path, allow_bare=True)
+        if route is not None:
+            _, _, noslash, plen, backend = route
+            search_path = path[plen - 1:]
+            infos = backend.glob_info(pattern, search_path if search_path else "/")
+            # 复制后再添加路由前缀，不修改后端返回的字典（后端可能缓存或共享结果）
+            return [{**fi, "path": noslash + fi["path"]} for fi in infos]
+                                                                                                                                                        
+        # 路径不匹配任何特定路由 - 并发搜索默认后端和所有路由后端
+        all_infos = _fan_out(
+            [
+                partial(self.default.glob_info, pattern, path),
+                *(partial(route.backend.glob_info, pattern, "/") for route in self._route_table),
+            ]
+        )
+        results: list[FileInfo] = list(all_infos[0])
+
+        for (_, _, noslash, _, _), infos in zip(self._route_table, all_infos[1:], strict=True):
+            # 添加路由前缀（复制字典，不修改后端返回的结果）
+            results += [{**fi, "path": noslash + fi["path"]} for fi in infos]
                                                                                                                                                         
-        # 确定性排序                                                                                                                                     
-        results.sort(key=lambda x: x.get("path", ""))                                                                                                    
+        # 确定性排序
+        results.sort(key=itemgetter("path"))
         return results
 
     def execute(self, command: str) -> ExecuteResponse:                                                                                                  
@@ -285,27 +428,37 @@ class CompositeBackend:
         Returns:                                                                                                                                         
             FileUploadResponse 列表，顺序与输入一致                                                                                                      
         """                                                                                                                                              
-        # 预分配结果列表                                                                                                                                 
-        results: list[FileUploadResponse | None] = [None] * len(files)                                                                                   
-                                                                                                                                                        
-        # 按后端分组，记录原始索引                                                                                                                       
-        backend_batches: dict[BackendProtocol, list[tuple[int, str, bytes]]] = defaultdict(list)                                                         
-                                                                                                                                                        
-        for idx, (path, content) in enumerate(files):                                                                                                    
-            backend, stripped_path = self._get_backend_and_key(path)                                                                                     
-            backend_batches[backend].append((idx, stripped_path, content))                                                                               
-                                                                                                                                                        
-        # 处理每个后端的批次                                                                                                                             
-        for backend, batch in backend_batches.items():                                                                                                   
-            # 提取数据                                                                                                                                   
-            indices, stripped_paths, contents = zip(*batch, strict=False)                                                                                
-            batch_files = list(zip(stripped_paths, contents, strict=False))                                                                              
-                                                                                                                                                        
-            # 调用后端（每个后端只调用一次）                                                                                                             
-            batch_responses = backend.upload_files(batch_files)                                                                                          
+        # 没有路由：所有路径都原样交给默认后端
+        if not self._route_table:
+            return self.default.upload_files(files)
+
+        # 单个文件：直接路由，省去分组与重组
+        if len(files) == 1:
+            path, content = files[0]
+            backend, stripped_path = self._get_backend_and_key(path)
+            responses = backend.upload_files([(stripped_path, content)])
+            return [FileUploadResponse(path=path, error=responses[0].error if responses else None)]
+
+        # 预分配结果列表
+        results: list[FileUploadResponse | None] = [None] * len(files)
                                                                                                                                                         
-            # 将响应放回原始位置，使用原始路径                                                                                                           
-            for i, orig_idx in enumerate(indices):                                                                                                       
+        # 按后端分组：原始索引与后端请求分别放在两个并行列表中，
+        # 请求列表可以直接传给后端，无需再 zip 转置
+        backend_batches: dict[BackendProtocol, tuple[list[int], list[tuple[str, bytes]]]] = {}
+
+        for idx, (path, content) in enumerate(files):
+            backend, stripped_path = self._get_backend_and_key(path)
+            batch = backend_batches.get(backend)
+            if batch is None:
+                batch = backend_batches[backend] = ([], [])
+            batch[0].append(idx)
+            batch[1].append((stripped_path, content))
+
+        # 并发调用各后端（每个后端只调用一次），慢后端不再阻塞其他后端
+        calls = [partial(backend.upload_files, batch_files) for backend, (_, batch_files) in backend_batches.items()]
+        for (indices, _), batch_responses in zip(backend_batches.values(), _fan_out(calls), strict=True):
+            # 将响应放回原始位置，使用原始路径
+            for i, orig_idx in enumerate(indices):
                 results[orig_idx] = FileUploadResponse(                                                                                                  
                     path=files[orig_idx][0],  # 原始路径                                                                                                 
                     error=batch_responses[i].error if i < len(batch_responses) else None,                                                                
@@ -324,26 +477,38 @@ class CompositeBackend:
         Returns:                                                                                                                                         
             FileDownloadResponse 列表，顺序与输入一致                                                                                                    
         """                                                                                                                                              
-        # 预分配结果列表                                                                                                                                 
-        results: list[FileDownloadResponse | None] = [None] * len(paths)                                                                                 
-                                                                                                                                                        
-        # 按后端分组                                                                                                                                     
-        backend_batches: dict[BackendProtocol, list[tuple[int, str]]] = defaultdict(list)                                                                
-                                                                                                                                                        
-        for idx, path in enumerate(paths):                                                                                                               
-            backend, stripped_path = self._get_backend_and_key(path)                                                                                     
-            backend_batches[backend].append((idx, stripped_path))                                                                                        
-                                                                                                                                                        
-        # 处理每个后端的批次                                                                                                                             
-        for backend, batch in backend_batches.items():                                                                                                   
-            # 提取数据                                                                                                                                   
-            indices, stripped_paths = zip(*batch, strict=False)                                                                                          
-                                                                                                                                                        
-            # 调用后端（每个后端只调用一次）                                                                                                             
-            batch_responses = backend.download_files(list(stripped_paths))                                                                               
+        # 没有路由：所有路径都原样交给默认后端
+        if not self._route_table:
+            return self.default.download_files(paths)
+
+        # 单个文件：直接路由，省去分组与重组
+        if len(paths) == 1:
+            path = paths[0]
+            backend, stripped_path = self._get_backend_and_key(path)
+            responses = backend.download_files([stripped_path])
+            if not responses:
+                return [FileDownloadResponse(path=path, content=None, error=None)]
+            return [FileDownloadResponse(path=path, content=responses[0].content, error=responses[0].error)]
+
+        # 预分配结果列表
+        results: list[FileDownloadResponse | None] = [None] * len(paths)
                                                                                                                                                         
-            # 将响应放回原始位置，使用原始路径                                                                                                           
-            for i, orig_idx in enumerate(indices):                                                                                                       
+        # 按后端分组：原始索引与去掉前缀的路径放在两个并行列表中
+        backend_batches: dict[BackendProtocol, tuple[list[int], list[str]]] = {}
+
+        for idx, path in enumerate(paths):
+            backend, stripped_path = self._get_backend_and_key(path)
+            batch = backend_batches.get(backend)
+            if batch is None:
+                batch = backend_batches[backend] = ([], [])
+            batch[0].append(idx)
+            batch[1].append(stripped_path)
+
+        # 并发调用各后端（每个后端只调用一次），慢后端不再阻塞其他后端
+        calls = [partial(backend.download_files, batch_paths) for backend, (_, batch_paths) in backend_batches.items()]
+        for (indices, _), batch_responses in zip(backend_batches.values(), _fan_out(calls), strict=True):
+            # 将响应放回原始位置，使用原始路径
+            for i, orig_idx in enumerate(indices):
                 results[orig_idx] = FileDownloadResponse(                                                                                                
                     path=paths[orig_idx],  # 原始路径                                                                                                    
                     content=batch_responses[i].content if i < len(batch_responses) else None,                                                            
@@ -351,3 +516,43 @@ class CompositeBackend:
                 )                                                                                                                                        
                                                                                                                                                         
         return results  # type: ignore[return-value]
+
+    def copy_files(self, pairs: list[tuple[str, str]]) -> list[FileUploadResponse]:
+        """复制文件，源与目标可以路由到不同后端.
+
+        源和目标都是 FilesystemBackend 时直接在内核中拷贝（copy_file_range），
+        其余情况退化为 download_files + upload_files。
+
+        Args:
+            pairs: (源路径, 目标路径) 元组列表
+
+        Returns:
+            FileUploadResponse 列表（path 为目标路径），顺序与输入一致
+        """
+        results: list[FileUploadResponse | None] = [None] * len(pairs)
+
+        # 需要经过用户态中转的复制
+        fallback: list[int] = []
+        for idx, (src, dst) in enumerate(pairs):
+            src_backend, src_key = self._get_backend_and_key(src)
+            dst_backend, dst_key = self._get_backend_and_key(dst)
+            if isinstance(src_backend, FilesystemBackend) and isinstance(dst_backend, FilesystemBackend):
+                response = dst_backend.copy_files_from(src_backend, [(src_key, dst_key)])[0]
+                results[idx] = FileUploadResponse(path=dst, error=response.error)
+            else:
+                fallback.append(idx)
+
+        if fallback:
+            downloads = self.download_files([pairs[idx][0] for idx in fallback])
+            uploads: list[tuple[int, tuple[str, bytes]]] = []
+            for idx, download in zip(fallback, downloads, strict=True):
+                if download.content is None:
+                    results[idx] = FileUploadResponse(path=pairs[idx][1], error=download.error or "file_not_found")
+                else:
+                    uploads.append((idx, (pairs[idx][1], download.content)))
+            if uploads:
+                responses = self.upload_files([item for _, item in uploads])
+                for (idx, _), response in zip(uploads, responses, strict=True):
+                    results[idx] = response
+
+        return results  # type: ignore[return-value]
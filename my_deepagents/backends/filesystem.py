@@ -6,15 +6,29 @@
 - 支持 Ripgrep 搜索（带 Python 回退）
 """
 
+import errno
 import json
 import os
 import re
+import shutil
+import stat
 import subprocess
+import threading
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
+from operator import itemgetter
 from pathlib import Path
+from typing import TextIO, TypeVar
 
 import wcmatch.glob as wcglob
 
+try:  # orjson 是可选依赖，解析 ripgrep 的 JSON 输出更快
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
+
 from my_deepagents.backends.protocol import (
     BackendProtocol,
     EditResult,
@@ -25,12 +39,223 @@ from my_deepagents.backends.protocol import (
     WriteResult,
 )
 from my_deepagents.backends.utils import (
+    _REGEX_SPECIAL,
+    EMPTY_CONTENT_WARNING,
     check_empty_content,
+    compile_glob,
     format_content_with_line_numbers,
     perform_string_replacement,
 )
 
 
+# 读取时的最小单次读取长度（fstat 报告大小为 0 的文件，如 /proc 下的文件）
+_READ_CHUNK = 64 * 1024
+
+# read() 对不小于该大小的文件逐行读取，读够请求的行就停止
+_STREAM_READ_MIN = 1 << 20
+
+# 批量上传/下载：达到该文件数才使用线程池，小批次串行执行
+_IO_PARALLEL_THRESHOLD = 4
+# 批量文件读写共用的线程池（进程内共享，与 CompositeBackend 的线程池分开，避免互相等待）
+_IO_MAX_WORKERS = 16
+_io_executor: ThreadPoolExecutor | None = None
+_io_lock = threading.Lock()
+
+_T = TypeVar("_T")
+_R = TypeVar("_R")
+
+# 匹配结果可能依赖行边界的正则语法（锚点、环视、原子组、占有量词），这类模式只能逐行匹配
+_LINE_CONTEXT_SYNTAX = re.compile(r"[\^$]|\\[AZ]|\(\?(?:<?[=!]|>)|[*+?}]\+")
+# glob 通配符；不含这些字符的模式只是普通文件名
+_GLOB_SPECIAL = re.compile(r"[*?\[\\]")
+# str.splitlines() 识别、但整文件扫描不处理的其他换行符
+_OTHER_LINE_BREAKS = re.compile("[\r\x0b\x0c\x1c-\x1e\x85\u2028\u2029]")
+# 整文件扫描至少命中这么多行、且超过约 1/3 的行匹配时，改为逐行匹配
+_DENSE_MIN_HITS = 32
+
+# ripgrep 搜索超时（秒），超时后回退到 Python 搜索
+_RIPGREP_TIMEOUT = 30
+
+# 读取 ripgrep 输出的管道缓冲区大小
+_RIPGREP_BUFSIZE = 1 << 16
+
+# copy_file_range 单次拷贝的最大字节数
+_COPY_CHUNK = 1 << 30
+
+
+def _read_fd(fd: int) -> bytes:
+    """按 fstat 得到的大小直接 os.read，跳过文件对象与缓冲层"""
+    size = os.fstat(fd).st_size
+    chunks = []
+    while chunk := os.read(fd, max(size, _READ_CHUNK)):
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def _open_regular(path: Path) -> int | None:
+    """只读打开普通文件，不存在或不是普通文件时返回 None
+
+    直接以 open 的结果为准，省去 exists()/is_file() 两次 stat；
+    O_NONBLOCK 保证遇到 FIFO 等特殊文件时不会阻塞（对普通文件无影响）。
+    """
+    flags = os.O_RDONLY | getattr(os, "O_NOFOLLOW", 0) | getattr(os, "O_NONBLOCK", 0)
+    try:
+        fd = os.open(path, flags)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    if not stat.S_ISREG(os.fstat(fd).st_mode):
+        os.close(fd)
+        return None
+    return fd
+
+
+def _read_line_range(f: TextIO, start: int, stop: int) -> tuple[list[str], int, bool]:
+    """逐行读取文件，返回 ([start, stop) 范围内的行, 已读行数, 是否全为空白)
+
+    行的划分与 content.splitlines() 一致。读够所需的行、且已确认文件不是空白时立即停止，
+    此时已读行数不是总行数；只有 start 超出已读行数时才会读完整个文件（即为总行数）。
+    """
+    selected: list[str] = []
+    count = 0
+    blank = True
+    for physical in f:
+        # 物理行以 \n 结尾，其中可能还有 splitlines 识别的其他换行符
+        for line in physical.splitlines():
+            if start <= count < stop:
+                selected.append(line)
+            count += 1
+        if blank and not physical.isspace():
+            blank = False
+        if not blank and count > start and count >= stop:
+            break
+    return selected, count, blank
+
+
+def _write_fd(fd: int, data: bytes) -> None:
+    """用 os.write 写完全部数据（处理部分写入）"""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def _copy_fd(src_fd: int, dst_fd: int) -> None:
+    """在两个文件描述符之间拷贝全部数据
+
+    优先使用 copy_file_range 在内核中完成拷贝（数据不经过用户态，
+    支持 reflink 的文件系统上甚至不复制数据块）；
+    平台或文件系统不支持时，从当前偏移继续用 os.read/os.write 拷贝。
+    """
+    copy_file_range = getattr(os, "copy_file_range", None)
+    if copy_file_range is not None:
+        try:
+            while copy_file_range(src_fd, dst_fd, _COPY_CHUNK):
+                pass
+            return
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP):
+                raise
+    while chunk := os.read(src_fd, _READ_CHUNK):
+        _write_fd(dst_fd, chunk)
+
+
+def _get_io_executor() -> ThreadPoolExecutor:
+    """获取（首次调用时创建）批量文件读写共用的线程池"""
+    global _io_executor
+    if _io_executor is None:
+        with _io_lock:
+            if _io_executor is None:
+                _io_executor = ThreadPoolExecutor(
+                    max_workers=_IO_MAX_WORKERS,
+                    thread_name_prefix="filesystem-backend",
+                )
+    return _io_executor
+
+
+def _map_io(fn: Callable[[_T], _R], items: list[_T]) -> list[_R]:
+    """对每个元素执行 fn，结果顺序与输入一致
+
+    元素较少时直接串行执行；否则提交到线程池，让多个文件的磁盘 I/O 重叠
+    （os.read/os.write 期间会释放 GIL）
+    """
+    if len(items) < _IO_PARALLEL_THRESHOLD:
+        return [fn(item) for item in items]
+    return list(_get_io_executor().map(fn, items))
+
+
+@lru_cache(maxsize=1)
+def _rg_path() -> str | None:
+    """查找 ripgrep 可执行文件（只查找一次），不可用时返回 None"""
+    return shutil.which("rg")
+
+
+def _scan_matching_lines(regex: re.Pattern[str], content: str) -> list[tuple[int, str]]:
+    """在整个文件上搜索，返回匹配的 (行号, 行内容)，与逐行 regex.search 的结果一致
+
+    每次从当前行首向后搜索，由 C 实现的 search 直接跳过不匹配的行；
+    找到候选位置后再用所在行确认（跨行的匹配会被排除），然后从下一行继续。
+    要求 content 只以 "\n" 分行，且模式不含 _LINE_CONTEXT_SYNTAX 中的语法。
+    """
+    search = regex.search
+    hits: list[tuple[int, str]] = []
+    end = len(content)
+    line_num = 1
+    line_start = 0
+    while (m := search(content, line_start)) is not None:
+        start = m.start()
+        # 末尾换行之后的空匹配不属于任何行
+        if start == end and (not content or content[-1] == "\n"):
+            break
+        skipped = content.count("\n", line_start, start)
+        if skipped:
+            line_num += skipped
+            line_start = content.rfind("\n", 0, start) + 1
+        line_end = content.find("\n", start)
+        if line_end == -1:
+            line_end = end
+        line = content[line_start:line_end]
+        # 非空匹配完全落在本行内时必然也能在行内匹配，否则需要用本行确认
+        if start < m.end() <= line_end or search(line):
+            hits.append((line_num, line))
+        if line_end == end:
+            break
+        line_start = line_end + 1
+        line_num += 1
+        # 匹配很密集时逐行匹配更快，剩余部分改为逐行处理
+        if len(hits) >= _DENSE_MIN_HITS and len(hits) * 3 > line_num:
+            hits += [(n, line) for n, line in enumerate(content[line_start:].splitlines(), line_num) if search(line)]
+            break
+    return hits
+
+
+def _walk_files(root: str) -> Iterator[tuple[os.DirEntry, str]]:
+    """用 os.scandir 递归遍历 root 下的文件，产出 (目录项, 相对 root 的路径)
+
+    顺序与 Path.rglob("*") 一致（目录先序）；文件类型直接取自目录项，
+    不进入符号链接目录（与 rglob 的 ** 一致），避免逃出搜索根。
+    """
+    stack = [(root, "")]
+    while stack:
+        dir_str, rel_dir = stack.pop()
+        try:
+            with os.scandir(dir_str) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        subdirs = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append((entry.path, rel_dir + entry.name + "/"))
+                    continue
+                if not entry.is_file():
+                    continue
+            except OSError:
+                continue
+            yield entry, rel_dir + entry.name
+        # 逆序入栈，保证按目录项顺序先序遍历
+        stack.extend(reversed(subdirs))
+
+
 # ============================================================
 # FilesystemBackend 类
 # ============================================================
@@ -58,6 +283,8 @@ class FilesystemBackend(BackendProtocol):
           max_file_size_mb: 搜索时的最大文件大小限制（MB）
         """
         self.cwd = Path(root_dir).resolve() if root_dir else Path.cwd()
+        # 虚拟模式下路径转换用的 cwd 前缀（以 / 结尾）
+        self._cwd_prefix = str(self.cwd).rstrip("/") + "/"
         self.virtual_mode = virtual_mode
         self.max_file_size_bytes = max_file_size_mb * 1024 * 1024
 
@@ -97,6 +324,17 @@ class FilesystemBackend(BackendProtocol):
             return path
         return (self.cwd / path).resolve()
 
+    def _display_path_fn(self) -> Callable[[str], str]:
+        """返回把绝对路径转换为对外路径的函数
+
+        非虚拟模式原样返回绝对路径；虚拟模式去掉 cwd 前缀，变为以 / 开头的虚拟路径
+        （虚拟模式下列出/搜索的目录都经过 _resolve_path 校验，必然位于 cwd 内）。
+        """
+        if not self.virtual_mode:
+            return lambda abs_path: abs_path
+        cwd_prefix = self._cwd_prefix
+        return lambda abs_path: "/" + abs_path.removeprefix(cwd_prefix)
+
     def ls_info(self, path: str = "/") -> list[FileInfo]:
         """列出目录下的文件和子目录（非递归）
 
@@ -110,86 +348,39 @@ class FilesystemBackend(BackendProtocol):
         if not dir_path.exists() or not dir_path.is_dir():
             return []
         results: list[FileInfo] = []
-        cwd_str = str(self.cwd)
-        if not cwd_str.endswith("/"):
-            cwd_str += "/"
+        to_display = self._display_path_fn()
         # 列出直接子目录（非递归）
+        # os.scandir 的目录项自带文件类型，每个条目只需一次 stat
         try:
-            for child_path in dir_path.iterdir():
-                try:
-                    is_file = child_path.is_file()
-                    is_dir = child_path.is_dir()
-                except OSError:
-                    continue
-                abs_path = str(child_path)
-
-                if not self.virtual_mode:
-                    # 非虚拟模式：使用绝对路径
-                    if is_file:
-                        try:
-                            st = child_path.stat()
-                            results.append(
-                                {
-                                    "path": abs_path,
-                                    "is_dir": False,
-                                    "size": int(st.st_size),
-                                    "modified_at": datetime.fromtimestamp(st.st_mtime).isoformat(),
-                                }
-                            )
-                        except OSError:
-                            results.append({"path": abs_path, "is_dir": False})
-                    elif is_dir:
-                        try:
-                            st = child_path.stat()
-                            results.append(
-                                {
-                                    "path": abs_path + "/",
-                                    "is_dir": True,
-                                    "size": 0,
-                                    "modified_at": datetime.fromtimestamp(st.st_mtime).isoformat(),
-                                }
-                            )
-                        except OSError:
-                            results.append({"path": abs_path + "/", "is_dir": True})
-                else:
-                    # 虚拟模式：去掉cwd前缀
-                    if abs_path.startswith(cwd_str):
-                        relative_path = abs_path[len(cwd_str) :]
-                    elif abs_path.startswith(str(self.cwd)):
-                        relative_path = abs_path[len(str(self.cwd)) :].lstrip("/")
-                    else:
-                        relative_path = abs_path
-                    virt_path = "/" + relative_path
-                    if is_file:
-                        try:
-                            st = child_path.stat()
-                            results.append(
-                                {
-                                    "path": virt_path,
-                                    "is_dir": False,
-                                    "size": int(st.st_size),
-                                    "modified_at": datetime.fromtimestamp(st.st_mtime).isoformat(),
-                                }
-                            )
-                        except OSError:
-                            results.append({"path": virt_path, "is_dir": False})
-                    elif is_dir:
-                        try:
-                            st = child_path.stat()
-                            results.append(
-                                {
-                                    "path": virt_path + "/",
-                                    "is_dir": True,
-                                    "size": 0,
-                                    "modified_at": datetime.fromtimestamp(st.st_mtime).isoformat(),
-                                }
-                            )
-                        except OSError:
-                            results.append({"path": virt_path + "/", "is_dir": True})
-        except (OSError, PermissionError):
-            pass
+            with os.scandir(dir_path) as it:
+                entries = list(it)
+        except OSError:
+            entries = []
+        for entry in entries:
+            try:
+                is_file = entry.is_file()
+                is_dir = not is_file and entry.is_dir()
+            except OSError:
+                continue
+            if not (is_file or is_dir):
+                continue
+            path_str = to_display(entry.path)
+            if is_dir:
+                path_str += "/"
+            try:
+                st = entry.stat()
+                results.append(
+                    {
+                        "path": path_str,
+                        "is_dir": is_dir,
+                        "size": 0 if is_dir else int(st.st_size),
+                        "modified_at": datetime.fromtimestamp(st.st_mtime).isoformat(),
+                    }
+                )
+            except OSError:
+                results.append({"path": path_str, "is_dir": is_dir})
         # 保持确定性顺序
-        results.sort(key=lambda x: x.get("path", ""))
+        results.sort(key=itemgetter("path"))
         return results
 
     def read(
@@ -210,12 +401,20 @@ class FilesystemBackend(BackendProtocol):
         """
         resolved_path = self._resolve_path(file_path)
 
-        if not resolved_path.exists() or not resolved_path.is_file():
-            return f"Error: File '{file_path}' not found"
         try:
             # 使用 O_NOFOLLOW 避免符号链接攻击
-            fd = os.open(resolved_path, os.O_RDONLY | getattr(os, "O_NOFOLLOW", 0))
+            fd = _open_regular(resolved_path)
+            if fd is None:
+                return f"Error: File '{file_path}' not found"
             with os.fdopen(fd, "r", encoding="utf-8") as f:
+                if offset >= 0 and os.fstat(fd).st_size >= _STREAM_READ_MIN:
+                    # 大文件：只读取到请求的行为止，不加载整个文件
+                    selected_lines, line_count, blank = _read_line_range(f, offset, offset + limit)
+                    if blank:
+                        return EMPTY_CONTENT_WARNING
+                    if offset >= line_count:
+                        return f"Error: Line offset {offset} exceeds file length ({line_count} lines)"
+                    return format_content_with_line_numbers(selected_lines, start_line=offset + 1)
                 content = f.read()
 
             empty_msg = check_empty_content(content)
@@ -259,10 +458,12 @@ class FilesystemBackend(BackendProtocol):
             flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
             if hasattr(os, "O_NOFOLLOW"):
                 flags |= os.O_NOFOLLOW
+            data = content.encode("utf-8")
             fd = os.open(resolved_path, flags, 0o644)
-
-            with os.fdopen(fd, "w", encoding="utf-8") as f:
-                f.write(content)
+            try:
+                _write_fd(fd, data)
+            finally:
+                os.close(fd)
 
             return WriteResult(path=file_path, files_update=None)
         except (OSError, UnicodeEncodeError) as e:
@@ -283,14 +484,20 @@ class FilesystemBackend(BackendProtocol):
 
         resolved_path = self._resolve_path(file_path)
 
-        if not resolved_path.exists() or not resolved_path.is_file():
-            return EditResult(error=f"Error: File '{file_path}' not found")
-        
         try:
             # 安全读取
-            fd = os.open(resolved_path, os.O_RDONLY | getattr(os, "O_NOFOLLOW", 0))
-            with os.fdopen(fd, "r", encoding="utf-8") as f:
-                content = f.read()
+            fd = _open_regular(resolved_path)
+            if fd is None:
+                return EditResult(error=f"Error: File '{file_path}' not found")
+            try:
+                raw = _read_fd(fd)
+            finally:
+                os.close(fd)
+            content = raw.decode("utf-8")
+            # 与文本模式读取保持一致：统一换行符为 \n
+            newlines_translated = "\r" in content
+            if newlines_translated:
+                content = content.replace("\r\n", "\n").replace("\r", "\n")
 
             result = perform_string_replacement(content, old_string, new_string, replace_all)
 
@@ -298,14 +505,22 @@ class FilesystemBackend(BackendProtocol):
                 return EditResult(error=result)
 
             new_content, occurrences = result
+            data = new_content.encode("utf-8")
+            # 第一处匹配之前的字节不变，只从该偏移开始覆写，再截断到新长度
+            # （换行符被转换过时磁盘内容与 content 不一致，需整体重写）
+            start = 0 if newlines_translated else raw.find(old_string.encode("utf-8"))
 
             # 安全写入
-            flags = os.O_WRONLY | os.O_TRUNC
+            flags = os.O_WRONLY
             if hasattr(os, "O_NOFOLLOW"):
                 flags |= os.O_NOFOLLOW
             fd = os.open(resolved_path, flags)
-            with os.fdopen(fd, "w", encoding="utf-8") as f:
-                f.write(new_content)
+            try:
+                os.lseek(fd, start, os.SEEK_SET)
+                _write_fd(fd, memoryview(data)[start:])
+                os.ftruncate(fd, len(data))
+            finally:
+                os.close(fd)
 
             return EditResult(path=file_path, files_update=None, occurrences=int(occurrences))
 
@@ -366,50 +581,84 @@ class FilesystemBackend(BackendProtocol):
         Returns:
             搜索结果字典，或 None（ripgrep 不可用时）
         """
-        cmd = ["rg", "--json"]
+        rg = _rg_path()
+        if rg is None:
+            return None
+
+        cmd = [rg, "--json"]
         if include_glob:
             cmd.extend(["--glob", include_glob])
         cmd.extend(["--", pattern, str(base_full)])
 
         try:
-            proc = subprocess.run(
+            # 以字节读取：非 match 事件无需解码，JSON 解析器直接接受 bytes
+            proc = subprocess.Popen(
                 cmd,
-                capture_output=True,
-                text=True,
-                timeout=30,
-                check=False,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                bufsize=_RIPGREP_BUFSIZE,
             )
-        except (subprocess.TimeoutExpired, FileNotFoundError):
+        except FileNotFoundError:
             return None
 
+        # 超时后杀掉进程，逐行读取随之结束
+        timed_out = threading.Event()
+
+        def _kill() -> None:
+            timed_out.set()
+            proc.kill()
+
+        timer = threading.Timer(_RIPGREP_TIMEOUT, _kill)
+        timer.start()
+
         results: dict[str, list[tuple[int, str]]] = {}
-        for line in proc.stdout.splitlines():
-            try:
-                data = json.loads(line)
-            except json.JSONDecodeError:
-                continue
-            if data.get("type") != "match":
-                continue
-            pdata = data.get("data", {})
-            ftext = pdata.get("path", {}).get("text")
-            if not ftext:
-                continue
-            p = Path(ftext)
-            if self.virtual_mode:
+        # ripgrep 按文件输出匹配，每个文件只解析一次路径
+        virt_paths: dict[str, str | None] = {}
+        try:
+            # 边读边解析，不把整个输出缓存在内存中
+            for line in proc.stdout:
+                # 只有 match 事件需要解析（ripgrep 的每个 JSON 事件都以 type 开头）
+                if not line.startswith(b'{"type":"match"'):
+                    continue
                 try:
-                    virt = "/" + str(p.resolve().relative_to(self.cwd))
-                except Exception:
+                    data = _json_loads(line)
+                except json.JSONDecodeError:
                     continue
-            else:
-                virt = str(p)
-            ln = pdata.get("line_number")
-            lt = pdata.get("lines", {}).get("text", "").rstrip("\n")
-            if ln is None:
-                continue
-            results.setdefault(virt, []).append((int(ln), lt))
+                pdata = data.get("data", {})
+                ftext = pdata.get("path", {}).get("text")
+                if not ftext:
+                    continue
+                if ftext not in virt_paths:
+                    virt_paths[ftext] = self._real_display_path(ftext)
+                virt = virt_paths[ftext]
+                if virt is None:
+                    continue
+                ln = pdata.get("line_number")
+                lt = pdata.get("lines", {}).get("text", "").rstrip("\n")
+                if ln is None:
+                    continue
+                results.setdefault(virt, []).append((int(ln), lt))
+        finally:
+            timer.cancel()
+            proc.stdout.close()
+            proc.wait()
 
+        if timed_out.is_set():
+            return None
         return results
 
+    def _real_display_path(self, abs_path: str) -> str | None:
+        """把搜索到的文件路径转换为返回给调用方的路径
+
+        虚拟模式下按真实路径（跟随符号链接）计算，指向 cwd 之外时返回 None。
+        """
+        if not self.virtual_mode:
+            return abs_path
+        real = os.path.realpath(abs_path)
+        if not real.startswith(self._cwd_prefix):
+            return None
+        return "/" + real.removeprefix(self._cwd_prefix)
+
         
     def _python_search(
         self,
@@ -422,37 +671,45 @@ class FilesystemBackend(BackendProtocol):
             regex = re.compile(pattern)
         except re.error:
             return {}
+        search = regex.search
+        # 模式的匹配结果与所在行的边界无关时，可以对整个文件做一次扫描
+        whole_file = not _LINE_CONTEXT_SYNTAX.search(pattern)
+        # 字面量模式先做子串查找，整个文件都不包含时无需逐行匹配
+        literal = None if _REGEX_SPECIAL.search(pattern) else pattern
 
         results: dict[str, list[tuple[int, str]]] = {}
         root = base_full if base_full.is_dir() else base_full.parent
+        matcher = compile_glob(include_glob, wcglob.BRACE) if include_glob else None
 
-        for fp in root.rglob("*"):
-            if not fp.is_file():
-                continue
+        for entry, _ in _walk_files(str(root)):
             # glob 过滤
-            if include_glob and not wcglob.globmatch(fp.name, include_glob, flags=wcglob.BRACE):
+            if matcher and not matcher.match(entry.name):
                 continue
             # 跳过大文件
             try:
-                if fp.stat().st_size > self.max_file_size_bytes:
+                if entry.stat().st_size > self.max_file_size_bytes:
                     continue
             except OSError:
                 continue
             # 读取并搜索
             try:
-                content = fp.read_text()
+                with open(entry.path) as f:
+                    content = f.read()
             except (UnicodeDecodeError, PermissionError, OSError):
                 continue
-            for line_num, line in enumerate(content.splitlines(), 1):
-                if regex.search(line):
-                    if self.virtual_mode:
-                        try:
-                            virt_path = "/" + str(fp.resolve().relative_to(self.cwd))
-                        except Exception:
-                            continue
-                    else:
-                        virt_path = str(fp)
-                    results.setdefault(virt_path, []).append((line_num, line))
+            if literal is not None and literal not in content:
+                continue
+            if whole_file and not _OTHER_LINE_BREAKS.search(content):
+                hits = _scan_matching_lines(regex, content)
+            else:
+                hits = [(line_num, line) for line_num, line in enumerate(content.splitlines(), 1) if search(line)]
+            if not hits:
+                continue
+            # 每个文件只解析一次路径，而不是每个匹配行一次
+            virt_path = self._real_display_path(entry.path)
+            if virt_path is None:
+                continue
+            results.setdefault(virt_path, []).extend(hits)
 
         return results
 
@@ -473,52 +730,37 @@ class FilesystemBackend(BackendProtocol):
         if not search_path.exists() or not search_path.is_dir():
             return []
 
+        # 空模式与以 ** 结尾的模式（rglob 只会产出目录）不会匹配任何文件
+        if not pattern or pattern.rsplit("/", 1)[-1] == "**":
+            return []
+
+        # 与 Path.rglob(pattern) 相同的语义：模式可匹配任意深度，* 也匹配隐藏文件
+        if "/" not in pattern and pattern not in (".", "..") and not _GLOB_SPECIAL.search(pattern):
+            # 普通文件名：直接比较目录项名称，省去逐个路径的 glob 匹配
+            matches = lambda entry, rel: entry.name == pattern
+        else:
+            glob_match = compile_glob("**/" + pattern, wcglob.GLOBSTAR | wcglob.DOTMATCH).match
+            matches = lambda entry, rel: glob_match(rel)
+        to_display = self._display_path_fn()
+
         results: list[FileInfo] = []
-        try:
-            for matched_path in search_path.rglob(pattern):
-                try:
-                    is_file = matched_path.is_file()
-                except OSError:
-                    continue
-                if not is_file:
-                    continue
-                abs_path = str(matched_path)
-                if not self.virtual_mode:
-                    try:
-                        st = matched_path.stat()
-                        results.append({
-                            "path": abs_path,
-                            "is_dir": False,
-                            "size": int(st.st_size),
-                            "modified_at": datetime.fromtimestamp(st.st_mtime).isoformat(),
-                        })
-                    except OSError:
-                        results.append({"path": abs_path, "is_dir": False})
-                else:
-                    cwd_str = str(self.cwd)
-                    if not cwd_str.endswith("/"):
-                        cwd_str += "/"
-                    if abs_path.startswith(cwd_str):
-                        relative_path = abs_path[len(cwd_str):]
-                    elif abs_path.startswith(str(self.cwd)):
-                        relative_path = abs_path[len(str(self.cwd)):].lstrip("/")
-                    else:
-                        relative_path = abs_path
-                    virt = "/" + relative_path
-                    try:
-                        st = matched_path.stat()
-                        results.append({
-                            "path": virt,
-                            "is_dir": False,
-                            "size": int(st.st_size),
-                            "modified_at": datetime.fromtimestamp(st.st_mtime).isoformat(),
-                        })
-                    except OSError:
-                        results.append({"path": virt, "is_dir": False})
-        except (OSError, ValueError):
-            pass
-
-        results.sort(key=lambda x: x.get("path", ""))
+        # 文件类型来自目录项（无需额外 stat），只对匹配的文件 stat 一次
+        for entry, rel in _walk_files(str(search_path)):
+            if not matches(entry, rel):
+                continue
+            virt = to_display(entry.path)
+            try:
+                st = entry.stat()
+                results.append({
+                    "path": virt,
+                    "is_dir": False,
+                    "size": int(st.st_size),
+                    "modified_at": datetime.fromtimestamp(st.st_mtime).isoformat(),
+                })
+            except OSError:
+                results.append({"path": virt, "is_dir": False})
+
+        results.sort(key=itemgetter("path"))
         return results
 
     def upload_files(self, files: list[tuple[str, bytes]]) -> list[FileUploadResponse]:
@@ -530,33 +772,61 @@ class FilesystemBackend(BackendProtocol):
         Returns:
             FileUploadResponse 列表，顺序与输入一致
         """
-        responses: list[FileUploadResponse] = []
-        for path, content in files:
+        results: list[FileUploadResponse | None] = [None] * len(files)
+        # 按解析后的路径分组：同一文件的多次写入在同一个任务中按输入顺序串行执行，
+        # 保证最后一次写入生效；不同文件之间并发写入
+        groups: dict[Path, list[int]] = {}
+        for i, (path, _) in enumerate(files):
             try:
-                resolved_path = self._resolve_path(path)
+                groups.setdefault(self._resolve_path(path), []).append(i)
+            except (ValueError, OSError):
+                results[i] = FileUploadResponse(path=path, error="invalid_path")
 
-                # 创建父目录
-                resolved_path.parent.mkdir(parents=True, exist_ok=True)
+        # 同一批次内每个父目录只创建一次（集合由多个工作线程共享，读写时加锁）
+        made_dirs: set[Path] = set()
+        dirs_lock = threading.Lock()
 
-                flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
-                if hasattr(os, "O_NOFOLLOW"):
-                    flags |= os.O_NOFOLLOW
-                fd = os.open(resolved_path, flags, 0o644)
-                with os.fdopen(fd, "wb") as f:
-                    f.write(content)
+        def upload_group(item: tuple[Path, list[int]]) -> None:
+            resolved_path, indices = item
+            for i in indices:
+                path, content = files[i]
+                results[i] = self._upload_one(path, resolved_path, content, made_dirs, dirs_lock)
 
-                responses.append(FileUploadResponse(path=path, error=None))
-            except FileNotFoundError:
-                responses.append(FileUploadResponse(path=path, error="file_not_found"))
-            except PermissionError:
-                responses.append(FileUploadResponse(path=path, error="permission_denied"))
-            except (ValueError, OSError) as e:
-                if isinstance(e, ValueError) or "invalid" in str(e).lower():
-                    responses.append(FileUploadResponse(path=path, error="invalid_path"))
-                else:
-                    responses.append(FileUploadResponse(path=path, error="invalid_path"))
+        _map_io(upload_group, list(groups.items()))
+        return results
 
-        return responses
+    def _upload_one(
+        self,
+        path: str,
+        resolved_path: Path,
+        content: bytes,
+        made_dirs: set[Path],
+        dirs_lock: threading.Lock,
+    ) -> FileUploadResponse:
+        """写入单个文件（upload_files 的工作函数）"""
+        try:
+            # 创建父目录（并发时可能重复创建，exist_ok 保证无害）
+            parent = resolved_path.parent
+            with dirs_lock:
+                made = parent in made_dirs
+            if not made:
+                parent.mkdir(parents=True, exist_ok=True)
+                with dirs_lock:
+                    made_dirs.add(parent)
+
+            fd = os.open(resolved_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_NOFOLLOW", 0), 0o644)
+            try:
+                _write_fd(fd, content)
+            finally:
+                os.close(fd)
+
+            return FileUploadResponse(path=path, error=None)
+        except FileNotFoundError:
+            return FileUploadResponse(path=path, error="file_not_found")
+        except PermissionError:
+            return FileUploadResponse(path=path, error="permission_denied")
+        except OSError:
+            return FileUploadResponse(path=path, error="invalid_path")
 
     def download_files(self, paths: list[str]) -> list[FileDownloadResponse]:
         """下载多个文件
@@ -567,21 +837,74 @@ class FilesystemBackend(BackendProtocol):
         Returns:
             FileDownloadResponse 列表，顺序与输入一致
         """
-        responses: list[FileDownloadResponse] = []
-        for path in paths:
+        return _map_io(self._download_one, paths)
+
+    def _download_one(self, path: str) -> FileDownloadResponse:
+        """读取单个文件（download_files 的工作函数）"""
+        try:
+            resolved_path = self._resolve_path(path)
+            # 使用 O_NOFOLLOW 防止符号链接攻击
+            fd = os.open(resolved_path, os.O_RDONLY | getattr(os, "O_NOFOLLOW", 0))
             try:
-                resolved_path = self._resolve_path(path)
-                # 使用 O_NOFOLLOW 防止符号链接攻击
-                fd = os.open(resolved_path, os.O_RDONLY | getattr(os, "O_NOFOLLOW", 0))
-                with os.fdopen(fd, "rb") as f:
-                    content = f.read()
-                responses.append(FileDownloadResponse(path=path, content=content, error=None))
+                content = _read_fd(fd)
+            finally:
+                os.close(fd)
+            return FileDownloadResponse(path=path, content=content, error=None)
+        except FileNotFoundError:
+            return FileDownloadResponse(path=path, content=None, error="file_not_found")
+        except PermissionError:
+            return FileDownloadResponse(path=path, content=None, error="permission_denied")
+        except IsADirectoryError:
+            return FileDownloadResponse(path=path, content=None, error="is_directory")
+        except ValueError:
+            return FileDownloadResponse(path=path, content=None, error="invalid_path")
+
+    def copy_files_from(
+        self,
+        source: "FilesystemBackend",
+        pairs: list[tuple[str, str]],
+    ) -> list[FileUploadResponse]:
+        """从另一个 FilesystemBackend（也可以是自身）复制文件
+
+        数据直接在内核中拷贝，不经过 download_files/upload_files 的用户态往返。
+
+        Args:
+            source: 源后端，源路径按它解析
+            pairs: [(源路径, 目标路径), ...] 列表，目标路径按本后端解析
+
+        Returns:
+            FileUploadResponse 列表（path 为目标路径），顺序与输入一致
+        """
+        responses: list[FileUploadResponse] = []
+        nofollow = getattr(os, "O_NOFOLLOW", 0)
+        for src_path, dst_path in pairs:
+            try:
+                src_fd = os.open(source._resolve_path(src_path), os.O_RDONLY | nofollow)
+                try:
+                    src_st = os.fstat(src_fd)
+                    if stat.S_ISDIR(src_st.st_mode):
+                        raise IsADirectoryError(src_path)
+                    resolved_path = self._resolve_path(dst_path)
+                    resolved_path.parent.mkdir(parents=True, exist_ok=True)
+                    # 先不截断：源和目标是同一个文件（同一路径、硬链接或共享根目录的两个路由）时，
+                    # 截断会清空源文件，此时内容已经就位，直接视为复制成功
+                    dst_fd = os.open(resolved_path, os.O_WRONLY | os.O_CREAT | nofollow, 0o644)
+                    try:
+                        dst_st = os.fstat(dst_fd)
+                        if (dst_st.st_dev, dst_st.st_ino) != (src_st.st_dev, src_st.st_ino):
+                            os.ftruncate(dst_fd, 0)
+                            _copy_fd(src_fd, dst_fd)
+                    finally:
+                        os.close(dst_fd)
+                finally:
+                    os.close(src_fd)
+                responses.append(FileUploadResponse(path=dst_path, error=None))
             except FileNotFoundError:
-                responses.append(FileDownloadResponse(path=path, content=None, error="file_not_found"))
+                responses.append(FileUploadResponse(path=dst_path, error="file_not_found"))
             except PermissionError:
-                responses.append(FileDownloadResponse(path=path, content=None, error="permission_denied"))
+                responses.append(FileUploadResponse(path=dst_path, error="permission_denied"))
             except IsADirectoryError:
-                responses.append(FileDownloadResponse(path=path, content=None, error="is_directory"))
-            except ValueError:
-                responses.append(FileDownloadResponse(path=path, content=None, error="invalid_path"))
+                responses.append(FileUploadResponse(path=dst_path, error="is_directory"))
+            except (ValueError, OSError):
+                responses.append(FileUploadResponse(path=dst_path, error="invalid_path"))
         return responses
@@ -23,7 +23,8 @@ FileOperationError = Literal[
 ]
 
 # 响应数据类 - FileDownloadResponse
-@dataclass
+# slots=True: 不生成实例 __dict__，构造更快、占用内存更少（grep/edit 循环中会大量创建）
+@dataclass(slots=True)
 # @dataclass 装饰器自动生成 __init__ 方法, __repr__ 方法, __eq__ 方法, __hash__ 方法, __str__ 方法
 class FileDownloadResponse:
     """文件下载响应"""
@@ -31,7 +32,7 @@ class FileDownloadResponse:
     content: bytes | None = None
     error: FileOperationError | None = None
 
-@dataclass
+@dataclass(slots=True)
 class FileUploadResponse:
     """文件上传响应"""
     path: str
@@ -59,14 +60,14 @@ class GrepMatch(TypedDict):
     #   | 可选字段  | NotRequired  | field(default=...) |
     #   TypedDict 适合需要序列化/反序列化的数据结构。
 
-@dataclass
+@dataclass(slots=True)
 class WriteResult:
     """写入结果"""
     error: str | None = None
     path: str | None = None
     files_update: dict[str, Any] | None = None # 状态更新字典(用于 StateBackend)
 
-@dataclass
+@dataclass(slots=True)
 class EditResult:
     """编辑结果"""
     error: str | None = None
@@ -83,6 +84,7 @@ class BackendProtocol(abc.ABC):
         "content": list[str], # 行内容列表
         "created_at": str, # 创建时间(ISO格式)
         "modified_at": str, # 修改时间(ISO格式)
+        "size": int, # 可选，内容字符数
     }
     """
 
@@ -279,6 +281,7 @@ class BackendProtocol(abc.ABC):
         """异步版本 of download_files"""
         return await asyncio.to_thread(self.download_files, paths)
 
+@dataclass(slots=True)
 class ExecuteResponse:
     """执行命令响应"""
     output: str  #stdout 和 stderr 合并输出
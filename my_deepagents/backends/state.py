@@ -1,6 +1,10 @@
 """StateBackend: 将文件存储在 LangGraph 状态中（临时存储）"""
 
-from typing import TYPE_CHECKING
+
+from collections.abc import Mapping
+from operator import itemgetter
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any
 
 from my_deepagents.backends.protocol import (
     BackendProtocol,
@@ -12,6 +16,7 @@ from my_deepagents.backends.protocol import (
 from my_deepagents.backends.utils import (
     _glob_search_files,
     create_file_data,
+    file_data_size,
     file_data_to_string,
     format_read_response,
     grep_matches_from_files,
@@ -22,6 +27,9 @@ from my_deepagents.backends.utils import (
 if TYPE_CHECKING:
     from langchain.tools import ToolRuntime
 
+# 状态中还没有 files 时使用的空映射
+_EMPTY_FILES: Mapping[str, Any] = MappingProxyType({})
+
 # TYPE_CHECKING 的作用：
 # if TYPE_CHECKING:
 #     from langchain.tools import ToolRuntime
@@ -42,6 +50,11 @@ class StateBackend(BackendProtocol):
         """初始化，接收 LangChain 的 ToolRuntime"""
         self.runtime = runtime
 
+    @property
+    def _files(self) -> Mapping[str, Any]:
+        """状态中的文件字典（还没有文件时返回共享的只读空映射，不必每次新建 {}）"""
+        return self.runtime.state.get("files", _EMPTY_FILES)
+
     def ls_info(self, path: str) -> list[FileInfo]:
         """列出目录内容（非递归）
         
@@ -51,39 +64,36 @@ class StateBackend(BackendProtocol):
         Returns:
            目录下的文件和子目录列表
         """
-        files = self.runtime.state.get("files", {})
+        files = self._files
         infos: list[FileInfo] = []
         subdirs: set[str] = set()
 
         # 规范化路径，确保以 / 结尾
         normalized_path = path if path.endswith("/") else path + "/"
+        plen = len(normalized_path)
 
+        # StateBackend 每次工具调用都新建，建索引的 O(N) 开销无法摊薄，一次线性扫描即可
         for k, fd in files.items():
             # 检查文件是否在指定目录下
             if not k.startswith(normalized_path):
                 continue
 
-            # 获取相对路径
-            relative = k[len(normalized_path):]
-
-            # 如果包含 /，说明在子目录中
-            if "/" in relative:
-                # Extract the immediate subdirectory name
-                subdir_name = relative.split("/")[0]
-                subdirs.add(normalized_path + subdir_name + "/")
+            # 第一个 / 之前是直接子项的名称；含 / 说明在子目录中
+            name, sep, _ = k[plen:].partition("/")
+            if sep:
+                subdirs.add(normalized_path + name + "/")
                 continue
 
             # 直接在当前目录的文件
-            size = len("\n".join(fd.get("content", [])))
             infos.append({
                 "path": k,
                 "is_dir": False,
-                "size": int(size),
+                "size": int(file_data_size(fd)),
                 "modified_at": fd.get("modified_at", ""),
             })
 
         # 添加子目录
-        for subdir in sorted(subdirs):
+        for subdir in subdirs:
             infos.append({
                 "path": subdir,
                 "is_dir": True,
@@ -91,7 +101,7 @@ class StateBackend(BackendProtocol):
                 "modified_at": "",
             })
 
-        infos.sort(key=lambda x: x.get("path", ""))
+        infos.sort(key=itemgetter("path"))
         return infos
 
     # 核心逻辑图示：
@@ -120,7 +130,7 @@ class StateBackend(BackendProtocol):
             offset: 起始行（0索引）
             limit: 最大行数
         """
-        files = self.runtime.state.get("files", {})
+        files = self._files
         file_data = files.get(file_path)
 
         if file_data is None:
@@ -137,7 +147,7 @@ class StateBackend(BackendProtocol):
           
           返回 WriteResult，包含 files_update 用于更新 LangGraph 状态
           """
-          files = self.runtime.state.get("files", {})
+          files = self._files
 
           if file_path in files:
               return WriteResult(
@@ -169,7 +179,7 @@ class StateBackend(BackendProtocol):
         
         返回 EditResult，包含 files_update 和替换次数
         """
-        files = self.runtime.state.get("files", {})
+        files = self._files
         file_data = files.get(file_path)
 
         if file_data is None:
@@ -202,12 +212,12 @@ class StateBackend(BackendProtocol):
         glob: str | None = None,
     ) -> list[GrepMatch] | str:
         """搜索文件内容"""
-        files = self.runtime.state.get("files", {})
+        files = self._files
         return grep_matches_from_files(files, pattern, path, glob)
 
     def glob_info(self, pattern: str, path: str = "/") -> list[FileInfo]:
         """根据 glob 模式查找文件"""
-        files = self.runtime.state.get("files", {})
+        files = self._files
         result = _glob_search_files(files, pattern, path)
 
         if result == "No files found":
@@ -218,7 +228,7 @@ class StateBackend(BackendProtocol):
 
         for p in paths:
             fd = files.get(p)
-            size = len("\n".join(fd.get("content", []))) if fd else 0
+            size = file_data_size(fd) if fd else 0
             infos.append({
                 "path": p,
                 "is_dir": False,
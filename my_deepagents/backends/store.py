@@ -1,5 +1,6 @@
 """StoreBackend: LangGraph BaseStore 适配器（持久化，跨会话）"""
 
+from operator import itemgetter
 from typing import TYPE_CHECKING, Any
 
 from langgraph.config import get_config
@@ -17,6 +18,7 @@ from my_deepagents.backends.protocol import (
 from my_deepagents.backends.utils import (
     _glob_search_files,
     create_file_data,
+    file_data_size,
     file_data_to_string,
     format_read_response,
     grep_matches_from_files,
@@ -27,6 +29,9 @@ from my_deepagents.backends.utils import (
 if TYPE_CHECKING:
     from langchain.tools import ToolRuntime
 
+# Store 中 FileData 的必需字段
+_FILE_DATA_FIELDS = itemgetter("content", "created_at", "modified_at")
+
 
 # ============================================================
 # StoreBackend 类
@@ -106,25 +111,32 @@ class StoreBackend(BackendProtocol):
             store_item: 存储项
 
         Returns:
-            FileData 字典，包含 content, created_at, modified_at
+            FileData 字典，包含 content, created_at, modified_at（以及可选的 size）
 
         Raises:
             ValueError: 如果必需字段缺失或类型错误
         """
-        if "content" not in store_item.value or not isinstance(store_item.value["content"], list):
-            msg = f"Store item does not contain valid content field. Got: {store_item.value.keys()}"
-            raise ValueError(msg)
-        if "created_at" not in store_item.value or not isinstance(store_item.value["created_at"], str):
-            msg = f"Store item does not contain valid created_at field. Got: {store_item.value.keys()}"
-            raise ValueError(msg)
-        if "modified_at" not in store_item.value or not isinstance(store_item.value["modified_at"], str):
-            msg = f"Store item does not contain valid modified_at field. Got: {store_item.value.keys()}"
-            raise ValueError(msg)
-        return {
-            "content": store_item.value["content"],
-            "created_at": store_item.value["created_at"],
-            "modified_at": store_item.value["modified_at"],
+        value = store_item.value
+        # 一次取出三个字段并做精确类型检查；不通过时再逐项检查，给出具体的错误信息
+        try:
+            content, created_at, modified_at = _FILE_DATA_FIELDS(value)
+        except KeyError:
+            content = created_at = modified_at = None
+        if type(content) is not list or type(created_at) is not str or type(modified_at) is not str:
+            for field, expected in (("content", list), ("created_at", str), ("modified_at", str)):
+                if field not in value or not isinstance(value[field], expected):
+                    msg = f"Store item does not contain valid {field} field. Got: {value.keys()}"
+                    raise ValueError(msg)
+        file_data = {
+            "content": content,
+            "created_at": created_at,
+            "modified_at": modified_at,
         }
+        # size 是可选字段，旧数据没有时由 file_data_size 按内容计算
+        size = value.get("size")
+        if isinstance(size, int):
+            file_data["size"] = size
+        return file_data
 
     def _convert_file_data_to_store_value(self, file_data: dict[str, Any]) -> dict[str, Any]:
         """将 FileData 转换为适合 store.put() 的字典
@@ -133,13 +145,16 @@ class StoreBackend(BackendProtocol):
             file_data: FileData 字典
 
         Returns:
-            包含 content, created_at, modified_at 的字典
+            包含 content, created_at, modified_at（以及可选的 size）的字典
         """
-        return {
+        value = {
             "content": file_data["content"],
             "created_at": file_data["created_at"],
             "modified_at": file_data["modified_at"],
         }
+        if "size" in file_data:
+            value["size"] = file_data["size"]
+        return value
 
     def _search_store_paginated(
         self,
@@ -148,16 +163,19 @@ class StoreBackend(BackendProtocol):
         *,
         query: str | None = None,
         filter: dict[str, Any] | None = None,
-        page_size: int = 100,
+        page_size: int = 1000,
     ) -> list[Item]:
         """分页搜索 store，获取所有结果
 
+        很多 store（如 InMemoryStore）每次 search 都会先筛选整个命名空间再按 offset 切片，
+        分页次数越多总开销越大，因此使用较大的页大小，让常见规模一次取完。
+
         Args:
             store: 存储实例
             namespace: 命名空间前缀
             query: 可选的自然语言查询
             filter: 键值对过滤条件
-            page_size: 每页数量（默认 100）
+            page_size: 每页数量（默认 1000）
 
         Returns:
             所有匹配的 Item 列表
@@ -209,18 +227,18 @@ class StoreBackend(BackendProtocol):
             # 获取相对路径                                                                                                                               
             relative = str(item.key)[len(normalized_path):]                                                                                              
                                                                                                                                                         
-            # 如果包含 /，说明在子目录中                                                                                                                 
-            if "/" in relative:                                                                                                                          
-                subdir_name = relative.split("/")[0]                                                                                                     
-                subdirs.add(normalized_path + subdir_name + "/")                                                                                         
-                continue                                                                                                                                 
+            # 如果包含 /，说明在子目录中
+            subdir_name, sep, _ = relative.partition("/")
+            if sep:
+                subdirs.add(normalized_path + subdir_name + "/")
+                continue
                                                                                                                                                         
             # 直接在当前目录的文件                                                                                                                       
             try:                                                                                                                                         
                 fd = self._convert_store_item_to_file_data(item)                                                                                         
             except ValueError:                                                                                                                           
                 continue                                                                                                                                 
-            size = len("\n".join(fd.get("content", [])))                                                                                                 
+            size = file_data_size(fd)
             infos.append({                                                                                                                               
                 "path": item.key,                                                                                                                        
                 "is_dir": False,                                                                                                                         
@@ -237,7 +255,7 @@ class StoreBackend(BackendProtocol):
                 "modified_at": "",                                                                                                                       
             })                                                                                                                                           
                                                                                                                                                         
-        infos.sort(key=lambda x: x.get("path", ""))                                                                                                      
+        infos.sort(key=itemgetter("path"))
         return infos
 
     def read(                                                                                                                                            
@@ -369,7 +387,7 @@ class StoreBackend(BackendProtocol):
         infos: list[FileInfo] = []                                                                                                                       
         for p in paths:                                                                                                                                  
             fd = files.get(p)                                                                                                                            
-            size = len("\n".join(fd.get("content", []))) if fd else 0                                                                                    
+            size = file_data_size(fd) if fd else 0
             infos.append({                                                                                                                               
                 "path": p,                                                                                                                               
                 "is_dir": False,                                                                                                                         
@@ -1,5 +1,6 @@
 import re
 from datetime import UTC, datetime
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Literal
 
@@ -14,6 +15,9 @@ LINE_NUMBER_WIDTH = 6            # 行号宽度
 TOOL_RESULT_TOKEN_LIMIT = 20000  # token 限制
 TRUNCATION_GUIDANCE = "... [results truncated, try being more specific with your parameters]"
 
+# 正则元字符；不含这些字符的模式按字面量处理
+_REGEX_SPECIAL = re.compile(r"[.^$*+?{}\[\]\\|()]")
+
 def sanitize_tool_call_id(tool_call_id: str) -> str:
     """清理 tool_call_id，防止路径穿越攻击
     
@@ -89,6 +93,22 @@ def file_data_to_string(file_data: dict[str, Any]) -> str:
     return "\n".join(file_data["content"])
 
 
+def _content_size(lines: list[str]) -> int:
+    """按行存储的内容拼接后的字符数，不实际拼接字符串"""
+    return sum(map(len, lines)) + max(len(lines) - 1, 0)
+
+
+def file_data_size(file_data: dict[str, Any]) -> int:
+    """FileData 的内容大小（与 len(file_data_to_string(...)) 相同）
+
+    优先使用写入时记录的 size，旧数据没有该字段时再按行计算。
+    """
+    size = file_data.get("size")
+    if size is None:
+        size = _content_size(file_data.get("content", []))
+    return int(size)
+
+
 def create_file_data(content: str, created_at: str | None = None) -> dict[str, Any]:
     """创建 FileData 对象
     
@@ -97,7 +117,7 @@ def create_file_data(content: str, created_at: str | None = None) -> dict[str, A
         created_at: 创建时间（可选）
     
     Returns:
-        {"content": [...], "created_at": "...", "modified_at": "..."}
+        {"content": [...], "created_at": "...", "modified_at": "...", "size": ...}
     """
     lines = content.split("\n") if isinstance(content, str) else content
     now = datetime.now(UTC).isoformat()
@@ -106,6 +126,7 @@ def create_file_data(content: str, created_at: str | None = None) -> dict[str, A
         "content": lines,
         "created_at": created_at or now,
         "modified_at": now,
+        "size": _content_size(lines),
     }
 
 
@@ -118,6 +139,7 @@ def update_file_data(file_data: dict[str, Any], content: str) -> dict[str, Any]:
         "content": lines,
         "created_at": file_data["created_at"],  # 保留原创建时间
         "modified_at": now,
+        "size": _content_size(lines),
     }
 
 # FileData 数据结构：
@@ -125,6 +147,7 @@ def update_file_data(file_data: dict[str, Any], content: str) -> dict[str, Any]:
 #     "content": ["第一行", "第二行", "第三行"],  # 按行存储
 #     "created_at": "2025-01-06T10:30:00+00:00",
 #     "modified_at": "2025-01-06T11:00:00+00:00",
+#     "size": 14,  # 内容字符数，列目录时无需重新拼接
 # }
 
 def format_read_response(
@@ -239,6 +262,16 @@ def _validate_path(path: str | None) -> str:
     # _validate_path  # 内部函数，不对外暴露
     # validate_path   # 公开函数
 
+@lru_cache(maxsize=256)
+def compile_glob(pattern: str, flags: int) -> wcglob.WcMatcher:
+    """编译并缓存 glob 模式
+
+    wcglob.globmatch 每次调用都会重新解析模式，agent 会反复使用
+    同样的模式（如 "*.py"），缓存编译结果后每次匹配只需一次 match。
+    """
+    return wcglob.compile(pattern, flags=flags)
+
+
 def _glob_search_files(
     files: dict[str, Any],
     pattern: str,
@@ -264,6 +297,11 @@ def _glob_search_files(
 
     effective_pattern = pattern
 
+    # 使用 wcmatch 进行 glob 匹配
+    # BRACE: 支持 {a,b} 语法
+    # GLOBSTAR: 支持 ** 递归匹配
+    matcher = compile_glob(effective_pattern, wcglob.BRACE | wcglob.GLOBSTAR)
+
     matches = []
     for file_path, file_data in filtered.items():
         # 获取相对路径
@@ -271,10 +309,7 @@ def _glob_search_files(
         if not relative:
             relative = file_path.split("/")[-1]
 
-        # 使用 wcmatch 进行 glob 匹配
-        # BRACE: 支持 {a,b} 语法
-        # GLOBSTAR: 支持 ** 递归匹配
-        if wcglob.globmatch(relative, effective_pattern, flags=wcglob.BRACE | wcglob.GLOBSTAR):
+        if matcher.match(relative):
             matches.append((file_path, file_data["modified_at"]))
 
     # 按修改时间降序排序
@@ -321,6 +356,21 @@ def _format_grep_results(
             lines.append(f"  {line_num}: {line}")
     return "\n".join(lines)
 
+def _matching_lines(
+    lines: list[str],
+    regex: re.Pattern[str],
+    literal: str | None,
+) -> list[tuple[int, str]]:
+    """返回匹配的 (行号, 行内容)
+
+    literal 不为 None 时模式不含正则元字符，直接用子串查找代替正则匹配。
+    """
+    if literal is not None:
+        return [(line_num, line) for line_num, line in enumerate(lines, 1) if literal in line]
+    search = regex.search
+    return [(line_num, line) for line_num, line in enumerate(lines, 1) if search(line)]
+
+
 def _grep_search_files(
     files: dict[str, Any],
     pattern: str,
@@ -354,19 +404,19 @@ def _grep_search_files(
 
     # 过滤文件类型
     if glob:
+        matcher = compile_glob(glob, wcglob.BRACE)
         filtered = {
             fp: fd for fp, fd in filtered.items()
-            if wcglob.globmatch(Path(fp).name, glob, flags=wcglob.BRACE)
+            if matcher.match(Path(fp).name)
         }
 
     # 搜索内容
+    literal = None if _REGEX_SPECIAL.search(pattern) else pattern
     results: dict[str, list[tuple[int, str]]] = {}
     for file_path, file_data in filtered.items():
-        for line_num, line in enumerate(file_data["content"], 1):
-            if regex.search(line):
-                if file_path not in results:
-                    results[file_path] = []
-                results[file_path].append((line_num, line))
+        hits = _matching_lines(file_data["content"], regex, literal)
+        if hits:
+            results[file_path] = hits
 
     if not results:
         return "No matches found"
@@ -399,16 +449,17 @@ def grep_matches_from_files(
     filtered = {fp: fd for fp, fd in files.items() if fp.startswith(normalized_path)}
 
     if glob:
+        matcher = compile_glob(glob, wcglob.BRACE)
         filtered = {
             fp: fd for fp, fd in filtered.items()
-            if wcglob.globmatch(Path(fp).name, glob, flags=wcglob.BRACE)
+            if matcher.match(Path(fp).name)
         }
 
+    literal = None if _REGEX_SPECIAL.search(pattern) else pattern
     matches: list[GrepMatch] = []
     for file_path, file_data in filtered.items():
-        for line_num, line in enumerate(file_data["content"], 1):
-            if regex.search(line):
-                matches.append({"path": file_path, "line": int(line_num), "text": line})
+        for line_num, line in _matching_lines(file_data["content"], regex, literal):
+            matches.append({"path": file_path, "line": int(line_num), "text": line})
 
     return matches
 
@@ -0,0 +1,398 @@
+"""Checkpointer: 针对长会话优化的检查点保存器
+
+MemorySaver 每个检查点都会把整个 messages 列表完整存一份，
+会话越长，历史消息被重复存储的次数越多（内存 O(历史长度²)）。
+PrefixCacheSaver 将 messages 按消息做内容寻址存储，并用前缀哈希链串起来：
+- 内容相同的消息只存一份
+- 相同前缀只存一份，不同检查点、不同线程之间共享
+- delete_thread 时回收不再被引用的消息与前缀
+
+TieredCheckpointer 则用于限制常驻内存：channel 数据超过内存上限后，
+按 LRU 把最久未访问的条目溢出到磁盘（SQLite），需要时再读回内存。
+"""
+
+import hashlib
+import itertools
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import uuid
+import weakref
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator, MutableMapping
+from pathlib import Path
+from typing import Any
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import ChannelVersions, Checkpoint, CheckpointMetadata
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+# 前缀链的类型标记，区别于底层序列化器产出的类型
+PREFIX_TYPE = "prefix_chain"
+
+# 空前缀的哈希（链的起点）
+_ROOT = b"\x00" * 32
+
+
+# 增量序列化的键: (thread_id, checkpoint_ns, channel)
+_ChainKey = tuple[str, str, str]
+
+
+class _Chained:
+    """标记需要按前缀链存储的列表（只由 PrefixCacheSaver.put 创建）"""
+
+    __slots__ = ("items", "key")
+
+    def __init__(self, items: list[Any], key: _ChainKey) -> None:
+        self.items = items
+        self.key = key
+
+
+class PrefixCachingSerializer(SerializerProtocol):
+    """带前缀链存储的序列化器
+
+    被 _Chained 标记的列表拆成「前缀哈希链」存储：
+    - 元素: digest = sha256(类型 + 序列化字节) -> (类型, 字节)
+    - 前缀: h_i = sha256(h_{i-1} + digest_i) -> (h_{i-1}, digest_i)
+    列表本身只序列化为链尾哈希 h_n，其他值直接交给底层序列化器。
+
+    每个 (线程, 命名空间, channel) 记住上次写入的元素对象及各位置的前缀哈希：
+    再次写入时，开头与上次是同一批对象（is 比较）的部分直接复用前缀，
+    只序列化、哈希新增的尾部，每轮开销与新消息数成正比而不是与历史长度成正比。
+    因此已写入检查点的元素不能再原地修改（与 LangGraph 状态不可变的约定一致），
+    替换消息（如 add_messages 按 id 替换）会产生新对象，从该位置起重新计算。
+    """
+
+    def __init__(self, serde: SerializerProtocol | None = None) -> None:
+        """
+        Args:
+            serde: 底层序列化器，默认 JsonPlusSerializer
+        """
+        self.serde = serde or JsonPlusSerializer()
+        # digest -> (类型, 字节)
+        self.items: dict[bytes, tuple[str, bytes]] = {}
+        # 前缀哈希 -> (父前缀哈希, 元素 digest)
+        self.prefixes: dict[bytes, tuple[bytes, bytes]] = {}
+        # 键 -> (上次写入的元素对象, 各位置的前缀哈希)
+        self.chains: dict[_ChainKey, tuple[list[Any], list[bytes]]] = {}
+
+    def dumps_typed(self, obj: Any) -> tuple[str, bytes]:
+        if not isinstance(obj, _Chained):
+            return self.serde.dumps_typed(obj)
+
+        items = obj.items
+        prev_items, prev_heads = self.chains.get(obj.key, ((), ()))
+        # 与上次写入的列表逐个比较对象身份，找出可以复用的公共前缀
+        reused = 0
+        for old, new in zip(prev_items, items):
+            if old is not new:
+                break
+            reused += 1
+        heads = list(prev_heads[:reused])
+        head = heads[-1] if heads else _ROOT
+        for elem in items[reused:]:
+            typ, data = self.serde.dumps_typed(elem)
+            digest = hashlib.sha256(typ.encode() + b"\x00" + data).digest()
+            self.items.setdefault(digest, (typ, data))
+            prefix = hashlib.sha256(head + digest).digest()
+            self.prefixes.setdefault(prefix, (head, digest))
+            head = prefix
+            heads.append(head)
+        self.chains[obj.key] = (list(items), heads)
+        return PREFIX_TYPE, head
+
+    def loads_typed(self, data: tuple[str, bytes]) -> Any:
+        typ, head = data
+        if typ != PREFIX_TYPE:
+            return self.serde.loads_typed(data)
+
+        # 从链尾回溯到起点，再反转得到元素顺序
+        digests: list[bytes] = []
+        while head != _ROOT:
+            head, digest = self.prefixes[head]
+            digests.append(digest)
+        digests.reverse()
+        return [self.serde.loads_typed(self.items[digest]) for digest in digests]
+
+    def forget(self, thread_id: str) -> None:
+        """丢弃该线程的增量序列化记录"""
+        self.chains = {key: chain for key, chain in self.chains.items() if key[0] != thread_id}
+
+    def prune(self, heads: Iterable[bytes]) -> None:
+        """只保留从 heads（以及增量序列化记录）可达的前缀与元素，其余全部删除"""
+        live_prefixes: set[bytes] = set()
+        live_items: set[bytes] = set()
+        recorded = (chain_heads[-1] for _, chain_heads in self.chains.values() if chain_heads)
+        for head in itertools.chain(heads, recorded):
+            while head != _ROOT and head not in live_prefixes:
+                live_prefixes.add(head)
+                head, digest = self.prefixes[head]
+                live_items.add(digest)
+        self.prefixes = {h: v for h, v in self.prefixes.items() if h in live_prefixes}
+        self.items = {d: v for d, v in self.items.items() if d in live_items}
+
+
+class PrefixCacheSaver(InMemorySaver):
+    """基于前缀链存储的内存检查点保存器
+
+    用法与 MemorySaver 相同，区别在于 messages channel 按前缀哈希链存储：
+    共享的历史前缀只存一份，长会话的内存占用随消息数线性增长。
+    其他 channel 与 MemorySaver 完全相同。
+
+    Example:
+        ```python
+        agent = create_deep_agent(model=model, checkpointer=PrefixCacheSaver())
+        ```
+    """
+
+    serde: PrefixCachingSerializer
+
+    def __init__(
+        self,
+        *,
+        serde: SerializerProtocol | None = None,
+        channels: Iterable[str] = ("messages",),
+    ) -> None:
+        """
+        Args:
+            serde: 底层序列化器，默认 JsonPlusSerializer
+            channels: 按前缀链存储的列表类型 channel，默认只有 messages
+        """
+        super().__init__(serde=PrefixCachingSerializer(serde))
+        self.chained_channels = frozenset(channels)
+        # put 与 delete_thread 的回收互斥，避免回收掉刚写入、还未登记到 blobs 的前缀
+        self._chain_lock = threading.Lock()
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        values = checkpoint["channel_values"]
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        chained = {
+            k: _Chained(values[k], (thread_id, checkpoint_ns, k))
+            for k in new_versions
+            if k in self.chained_channels and isinstance(values.get(k), list)
+        }
+        if chained:
+            checkpoint = {**checkpoint, "channel_values": {**values, **chained}}
+        with self._chain_lock:
+            return super().put(config, checkpoint, metadata, new_versions)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._chain_lock:
+            super().delete_thread(thread_id)
+            self.serde.forget(thread_id)
+            self.serde.prune(data for typ, data in self.blobs.values() if typ == PREFIX_TYPE)
+
+
+# ============================================================
+# 内存 + 磁盘两级存储
+# ============================================================
+
+# blobs 的键: (thread_id, checkpoint_ns, channel, version)
+_BlobKey = tuple[str, str, str, str | int | float]
+
+
+class TieredBlobStore(MutableMapping[_BlobKey, tuple[str, bytes]]):
+    """内存 + 磁盘两级的 blob 映射
+
+    热数据放在内存 OrderedDict 中（按访问顺序排列），总字节数超过
+    capacity_bytes 时，把最久未访问的条目写入 SQLite 并从内存删除；
+    读取磁盘上的条目时再提升回内存。
+
+    每个实例的溢出数据以独立的 owner 标识存放，多个实例共用同一个数据库文件时互不可见；
+    close() 时删除本实例的全部溢出数据。未指定 path 时使用本实例独占的临时文件，close() 时一并删除。
+    """
+
+    def __init__(self, path: str | Path | None, capacity_bytes: int) -> None:
+        """
+        Args:
+            path: SQLite 数据库文件路径，None 表示使用临时文件
+            capacity_bytes: 内存中保留的 blob 总字节数上限
+        """
+        self.capacity_bytes = capacity_bytes
+        self._hot: OrderedDict[_BlobKey, tuple[str, bytes]] = OrderedDict()
+        self._hot_bytes = 0
+        self._lock = threading.RLock()
+        self._owner = uuid.uuid4().hex
+        if path is None:
+            fd, temp_path = tempfile.mkstemp(prefix="checkpoint-blobs-", suffix=".sqlite")
+            os.close(fd)
+            self.path = Path(temp_path)
+        else:
+            self.path = Path(path)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS spilled_blobs "
+            "(owner TEXT, key TEXT, typ TEXT, data BLOB, PRIMARY KEY (owner, key))"
+        )
+        # 未调用 close() 就被回收或进程退出时，也清理本实例的溢出数据
+        self._finalizer = weakref.finalize(
+            self, _drop_spilled, self._conn, self._owner, self.path if path is None else None
+        )
+
+    @staticmethod
+    def _encode_key(key: _BlobKey) -> str:
+        return json.dumps(list(key))
+
+    @staticmethod
+    def _size(value: tuple[str, bytes]) -> int:
+        return len(value[0]) + len(value[1])
+
+    def _evict(self) -> None:
+        """把超出内存上限的最旧条目批量写入磁盘"""
+        spilled = []
+        while self._hot_bytes > self.capacity_bytes and len(self._hot) > 1:
+            key, value = self._hot.popitem(last=False)
+            self._hot_bytes -= self._size(value)
+            spilled.append((self._owner, self._encode_key(key), value[0], value[1]))
+        if spilled:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO spilled_blobs (owner, key, typ, data) VALUES (?, ?, ?, ?)",
+                    spilled,
+                )
+
+    def _load_cold(self, key: _BlobKey) -> tuple[str, bytes] | None:
+        row = self._conn.execute(
+            "SELECT typ, data FROM spilled_blobs WHERE owner = ? AND key = ?",
+            (self._owner, self._encode_key(key)),
+        ).fetchone()
+        return None if row is None else (row[0], bytes(row[1]))
+
+    def _delete_cold(self, key: _BlobKey) -> int:
+        with self._conn:
+            return self._conn.execute(
+                "DELETE FROM spilled_blobs WHERE owner = ? AND key = ?",
+                (self._owner, self._encode_key(key)),
+            ).rowcount
+
+    def __getitem__(self, key: _BlobKey) -> tuple[str, bytes]:
+        with self._lock:
+            value = self._hot.get(key)
+            if value is not None:
+                self._hot.move_to_end(key)
+                return value
+            value = self._load_cold(key)
+            if value is None:
+                raise KeyError(key)
+            # 提升回内存，磁盘上的副本删除，保证每个键只存在于一层
+            self._delete_cold(key)
+            self._hot[key] = value
+            self._hot_bytes += self._size(value)
+            self._evict()
+            return value
+
+    def __setitem__(self, key: _BlobKey, value: tuple[str, bytes]) -> None:
+        with self._lock:
+            old = self._hot.pop(key, None)
+            if old is not None:
+                self._hot_bytes -= self._size(old)
+            self._hot[key] = value
+            self._hot_bytes += self._size(value)
+            self._evict()
+
+    def __delitem__(self, key: _BlobKey) -> None:
+        with self._lock:
+            old = self._hot.pop(key, None)
+            if old is not None:
+                self._hot_bytes -= self._size(old)
+            deleted = self._delete_cold(key)
+            if old is None and not deleted:
+                raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        with self._lock:
+            if key in self._hot:
+                return True
+            if not isinstance(key, tuple):
+                return False
+            row = self._conn.execute(
+                "SELECT 1 FROM spilled_blobs WHERE owner = ? AND key = ?",
+                (self._owner, self._encode_key(key)),
+            ).fetchone()
+            return row is not None
+
+    def __iter__(self) -> Iterator[_BlobKey]:
+        with self._lock:
+            keys = list(self._hot)
+            rows = self._conn.execute(
+                "SELECT key FROM spilled_blobs WHERE owner = ?", (self._owner,)
+            ).fetchall()
+        yield from keys
+        for (encoded,) in rows:
+            yield tuple(json.loads(encoded))
+
+    def __len__(self) -> int:
+        with self._lock:
+            (cold,) = self._conn.execute(
+                "SELECT COUNT(*) FROM spilled_blobs WHERE owner = ?", (self._owner,)
+            ).fetchone()
+            return len(self._hot) + cold
+
+    def close(self) -> None:
+        """删除本实例的溢出数据并关闭数据库连接（可重复调用）"""
+        with self._lock:
+            self._finalizer()
+
+
+def _drop_spilled(conn: sqlite3.Connection, owner: str, temp_path: Path | None) -> None:
+    """删除某个实例的溢出数据；临时文件则直接删除整个文件"""
+    try:
+        if temp_path is None:
+            with conn:
+                conn.execute("DELETE FROM spilled_blobs WHERE owner = ?", (owner,))
+    except sqlite3.Error:
+        pass
+    finally:
+        conn.close()
+    if temp_path is not None:
+        temp_path.unlink(missing_ok=True)
+
+
+class TieredCheckpointer(InMemorySaver):
+    """内存 + 磁盘两级的检查点保存器
+
+    在 InMemorySaver 的基础上，把占用绝大部分内存的 channel 数据（blobs）
+    换成 TieredBlobStore：内存中最多保留 capacity_bytes 字节，其余按 LRU 溢出到磁盘，
+    长时间运行的会话常驻内存不再无限增长。
+    检查点索引和 pending writes 仍在内存中，因此不支持进程重启后恢复会话；
+    溢出数据只属于当前实例，close（或退出 with 块）时删除。
+
+    Example:
+        ```python
+        with TieredCheckpointer(capacity_bytes=64 * 1024 * 1024) as checkpointer:
+            agent = create_deep_agent(model=model, checkpointer=checkpointer)
+        ```
+    """
+
+    def __init__(
+        self,
+        *,
+        capacity_bytes: int = 64 * 1024 * 1024,
+        path: str | Path | None = None,
+        serde: SerializerProtocol | None = None,
+    ) -> None:
+        """
+        Args:
+            capacity_bytes: 内存中保留的 channel 数据总字节数上限
+            path: 溢出数据的 SQLite 文件路径，默认使用本实例独占的临时文件
+            serde: 序列化器，默认 JsonPlusSerializer
+        """
+        super().__init__(serde=serde)
+        self.blobs = TieredBlobStore(path, capacity_bytes)
+        self.stack.callback(self.blobs.close)
+
+    def close(self) -> None:
+        """删除溢出到磁盘的数据并关闭数据库"""
+        self.blobs.close()
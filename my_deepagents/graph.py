@@ -1,5 +1,8 @@
 """DeepAgents - 集成规划、文件系统和子代理的智能代理框架"""
 
+import asyncio
+import threading
+from collections import OrderedDict
 from collections.abc import Callable, Sequence
 from typing import Any
 
@@ -16,6 +19,7 @@ from langchain.chat_models import init_chat_model
 from langchain_anthropic import ChatAnthropic
 from langchain_anthropic.middleware import AnthropicPromptCachingMiddleware
 from langchain_core.language_models import BaseChatModel
+from langchain_core.runnables import Runnable
 from langchain_core.tools import BaseTool
 from langgraph.cache.base import BaseCache
 from langgraph.graph.state import CompiledStateGraph
@@ -24,7 +28,9 @@ from langgraph.types import Checkpointer
 
 from my_deepagents.backends.protocol import BackendFactory, BackendProtocol
 from my_deepagents.middleware.filesystem import FilesystemMiddleware
+from my_deepagents.middleware.model_concurrency import ModelConcurrencyMiddleware
 from my_deepagents.middleware.patch_tool_calls import PatchToolCallsMiddleware
+from my_deepagents.middleware.sequential_tool_calls import SequentialToolCallsMiddleware
 from my_deepagents.middleware.subagents import (
     CompiledSubAgent,
     SubAgent,
@@ -38,6 +44,16 @@ from my_deepagents.middleware.subagents import (
 
 BASE_AGENT_PROMPT = "为了完成用户交给你的目标，你可以使用一系列标准工具。"
 
+# create_deep_agent_cached 最多缓存的代理数
+AGENT_CACHE_SIZE = 8
+
+# 消息角色：构造 {"role": ..., "content": ...} 输入时共用同一个字符串对象
+# （标识符形式的字面量在编译期已被驻留，这里无需 sys.intern）
+ROLE_USER = "user"
+ROLE_ASSISTANT = "assistant"
+ROLE_SYSTEM = "system"
+ROLE_TOOL = "tool"
+
 
 # ============================================================
 # 核心函数
@@ -66,10 +82,17 @@ def create_deep_agent(
     debug: bool = False,
     name: str | None = None,
     cache: BaseCache | None = None,
+    parallel_tools: bool = True,
+    max_concurrent_llm: int | None = None,
 ) -> CompiledStateGraph:
     """创建 DeepAgent
     
-    默认包含: TodoList,文件系统工具(ls/read/write/edit/glob/grep/execute),子代理工具"""
+    默认包含: TodoList,文件系统工具(ls/read/write/edit/glob/grep/execute),子代理工具
+
+    parallel_tools=True 时，模型单轮发出的多个工具调用会并发执行；
+    设为 False 则要求模型每轮只发出一个工具调用（主代理和子代理都生效）
+
+    max_concurrent_llm 限制主代理与所有子代理同时进行的模型调用数，默认 None 不限制"""
 
     # 1.模型初始化
     if model is None:
@@ -91,7 +114,14 @@ def create_deep_agent(
         keep = ("messages", 6)
 
     # 3. 构建中间件
+    # 串行模式下追加到主代理和子代理的中间件列表末尾
+    tool_call_middleware = [] if parallel_tools else [SequentialToolCallsMiddleware()]
+    # 并发限制放在最外层，主代理和子代理共享同一个实例（即同一个信号量）
+    concurrency_middleware = (
+        [] if max_concurrent_llm is None else [ModelConcurrencyMiddleware(max_concurrent_llm)]
+    )
     deepagent_middleware = [
+        *concurrency_middleware,
         TodoListMiddleware(),
         FilesystemMiddleware(backend=backend),
         SubAgentMiddleware(
@@ -99,6 +129,7 @@ def create_deep_agent(
             default_tools=tools,
             subagents=subagents if subagents is not None else [],
             default_middleware=[
+                *concurrency_middleware,
                 TodoListMiddleware(),
                 FilesystemMiddleware(backend=backend),
                 SummarizationMiddleware(
@@ -109,6 +140,7 @@ def create_deep_agent(
                 ),
                 AnthropicPromptCachingMiddleware(unsupported_model_behavior="ignore"),
                 PatchToolCallsMiddleware(),
+                *tool_call_middleware,
             ],
             default_interrupt_on=interrupt_on,
             general_purpose_agent=True,
@@ -121,6 +153,7 @@ def create_deep_agent(
         ),
         AnthropicPromptCachingMiddleware(unsupported_model_behavior="ignore"),
         PatchToolCallsMiddleware(),
+        *tool_call_middleware,
     ]
 
     # 添加用户自定义中间件
@@ -144,4 +177,88 @@ def create_deep_agent(
         debug=debug,
         name=name,
         cache=cache,
-    ).with_config({"recursion_limit": 1000})
\ No newline at end of file
+    ).with_config({"recursion_limit": 1000})
+
+# ============================================================
+# 编译结果缓存
+# ============================================================
+
+# 缓存键 -> (参数对象的强引用, 编译好的代理)；
+# 保留引用是为了防止参数对象被回收后 id 被新对象复用而误命中
+_AGENT_CACHE: OrderedDict[Any, tuple[list[Any], CompiledStateGraph]] = OrderedDict()
+_AGENT_CACHE_LOCK = threading.Lock()
+
+
+def _freeze(value: Any, refs: list[Any]) -> Any:
+    """把参数转换为可哈希的缓存键
+
+    字符串、数字等标量按值比较，容器逐项转换，
+    其余对象（模型、工具、中间件、检查点等）按身份比较
+    """
+    if value is None or isinstance(value, (str, int, float, bool, bytes)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item, refs) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item, refs)) for key, item in value.items()))
+    refs.append(value)
+    return ("id", id(value))
+
+
+def create_deep_agent_cached(
+    model: str | BaseChatModel | None = None,
+    tools: Sequence[BaseTool | Callable | dict[str, Any]] | None = None,
+    **kwargs: Any,
+) -> CompiledStateGraph:
+    """带进程内缓存的 create_deep_agent
+
+    参数相同（对象参数为同一实例）时直接返回之前编译好的代理，
+    跳过模型初始化、中间件构建和图编译。适合需要反复创建代理的服务或批量评测。
+    编译后的图持有模型客户端等运行时对象，无法 pickle 到磁盘跨进程复用。
+    """
+    refs: list[Any] = []
+    key = _freeze((model, tools, kwargs), refs)
+    with _AGENT_CACHE_LOCK:
+        cached = _AGENT_CACHE.get(key)
+        if cached is not None:
+            _AGENT_CACHE.move_to_end(key)
+            return cached[1]
+
+    agent = create_deep_agent(model, tools, **kwargs)
+    with _AGENT_CACHE_LOCK:
+        _AGENT_CACHE[key] = (refs, agent)
+        if len(_AGENT_CACHE) > AGENT_CACHE_SIZE:
+            _AGENT_CACHE.popitem(last=False)
+    return agent
+
+
+async def arun_batch(
+    agent: Runnable,
+    items: Sequence[dict[str, Any]],
+    *,
+    max_concurrency: int = 8,
+) -> list[Any]:
+    """并发运行多个相互独立的会话
+
+    每个会话使用自己的 thread_id，彼此的检查点状态互不干扰；
+    信号量限制同时进行的会话数，多个会话的网络等待得以重叠。
+
+    注意：同一个 agent 实例在所有会话间共享，中间件若在实例上保存了
+    会话相关的状态，需要为每个会话分别创建 agent。
+
+    Args:
+        agent: create_deep_agent 返回的代理
+        items: 会话列表，每项形如 {"input": {...}, "thread_id": "..."}
+        max_concurrency: 同时运行的会话上限
+
+    Returns:
+        与 items 顺序一致的 ainvoke 结果列表
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _run_one(item: dict[str, Any]) -> Any:
+        async with semaphore:
+            config = {"configurable": {"thread_id": item["thread_id"]}}
+            return await agent.ainvoke(item["input"], config=config)
+
+    return await asyncio.gather(*(_run_one(item) for item in items))
@@ -0,0 +1,38 @@
+"""模型调用共享的 HTTP 客户端
+
+子代理扇出时，N 个子代理几乎同时各发一次模型请求。
+让它们共享一个带 keep-alive 连接池的 httpx.AsyncClient，
+并发请求复用已建立的连接，省去每个请求单独握手的开销。
+"""
+
+import importlib.util
+
+import httpx
+
+
+def create_async_client(
+    *,
+    max_keepalive_connections: int = 32,
+    keepalive_expiry: float = 30.0,
+    timeout: float = 60.0,
+    http2: bool | None = None,
+) -> httpx.AsyncClient:
+    """创建带 keep-alive 连接池的 httpx.AsyncClient
+
+    传给 ChatOpenAI(http_async_client=...)，让所有异步调用共享连接。
+
+    Args:
+        max_keepalive_connections: 保持的空闲连接上限
+        keepalive_expiry: 空闲连接保持时间（秒）
+        timeout: 请求超时（秒）
+        http2: 是否启用 HTTP/2（多个请求复用同一连接）；
+            默认在安装了 h2 包时启用
+    """
+    if http2 is None:
+        http2 = importlib.util.find_spec("h2") is not None
+    limits = httpx.Limits(
+        max_keepalive_connections=max_keepalive_connections,
+        keepalive_expiry=keepalive_expiry,
+    )
+    return httpx.AsyncClient(limits=limits, timeout=timeout, http2=http2)
+
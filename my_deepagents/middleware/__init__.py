@@ -1,7 +1,9 @@
 """Middleware package - 中间件系统，扩展 Agent 能力"""
 
 from my_deepagents.middleware.filesystem import FilesystemMiddleware, FilesystemState
+from my_deepagents.middleware.model_concurrency import ModelConcurrencyMiddleware
 from my_deepagents.middleware.patch_tool_calls import PatchToolCallsMiddleware
+from my_deepagents.middleware.sequential_tool_calls import SequentialToolCallsMiddleware
 from my_deepagents.middleware.subagents import (
     CompiledSubAgent,
     SubAgent,
@@ -11,7 +13,9 @@ from my_deepagents.middleware.subagents import (
 __all__ = [
     "FilesystemMiddleware",
     "FilesystemState",
+    "ModelConcurrencyMiddleware",
     "PatchToolCallsMiddleware",
+    "SequentialToolCallsMiddleware",
     "SubAgentMiddleware",
     "SubAgent",
     "CompiledSubAgent",
@@ -45,6 +45,7 @@ class FileData(TypedDict):
     content:list[str]
     created_at:str
     modified_at:str
+    size:NotRequired[int]
 
 def _file_data_reducer(
     left: dict[str, FileData] | None,
@@ -735,7 +736,7 @@ class FilesystemMiddleware(AgentMiddleware):
                 return tool_result
 
             command_messages = update.get("messages", [])
-            accumulated_file_updates = dict(update.get("files", {}))
+            accumulated_file_updates = update.get("files", {}).copy()
             resolved_backend = self._get_backend(runtime)
             processed_messages = []
 
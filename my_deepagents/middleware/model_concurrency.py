@@ -0,0 +1,60 @@
+"""限制模型调用并发数的中间件"""
+import asyncio
+import threading
+import weakref
+from collections.abc import Awaitable, Callable
+
+from langchain.agents.middleware.types import AgentMiddleware, ModelRequest, ModelResponse
+
+
+class ModelConcurrencyMiddleware(AgentMiddleware):
+    """用信号量限制同时进行的模型调用数量
+
+    子代理通过并行的 task 工具调用扇出时，不加限制会触发服务商的限流。
+    同一个实例同时挂到主代理和子代理上，所有模型调用共享同一个上限。
+
+    - 异步调用: asyncio.Semaphore，按事件循环分别创建（信号量不能跨循环使用）
+    - 同步调用: threading.BoundedSemaphore（同步工具在线程池中执行）
+    """
+
+    def __init__(self, max_concurrency: int = 4) -> None:
+        """
+        Args:
+            max_concurrency: 同时进行的模型调用上限
+        """
+        super().__init__()
+        if max_concurrency < 1:
+            msg = f"max_concurrency must be >= 1, got {max_concurrency}"
+            raise ValueError(msg)
+        self.max_concurrency = max_concurrency
+        self._thread_semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._loop_semaphores: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, asyncio.Semaphore
+        ] = weakref.WeakKeyDictionary()
+
+    def _get_async_semaphore(self) -> asyncio.Semaphore:
+        """获取当前事件循环对应的信号量（首次使用时创建）"""
+        loop = asyncio.get_running_loop()
+        semaphore = self._loop_semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop_semaphores[loop] = semaphore
+        return semaphore
+
+    def wrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], ModelResponse],
+    ) -> ModelResponse:
+        """同步模型调用：占用一个线程信号量名额"""
+        with self._thread_semaphore:
+            return handler(request)
+
+    async def awrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], Awaitable[ModelResponse]],
+    ) -> ModelResponse:
+        """异步模型调用：占用当前事件循环的信号量名额"""
+        async with self._get_async_semaphore():
+            return await handler(request)
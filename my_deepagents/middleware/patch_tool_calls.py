@@ -26,26 +26,30 @@ class PatchToolCallsMiddleware(AgentMiddleware):
         if not messages or len(messages) == 0:
             return None
 
+        # 一次遍历收集所有已有响应的工具调用 id
+        answered_ids = {m.tool_call_id for m in messages if m.type == "tool"}
+
+        # 绝大多数轮次没有悬空调用，此时不返回任何更新，
+        # 避免用 Overwrite 把整段历史重新写回状态（每轮 O(历史长度)）
+        if not any(
+            tool_call["id"] not in answered_ids
+            for msg in messages
+            if msg.type == "ai"
+            for tool_call in msg.tool_calls
+        ):
+            return None
+
         patched_messages = []
 
-        # 遍历消息,检查每个 AIMessage 的工具调用部分
-        for i,msg in enumerate(messages):
+        # 遍历消息,在悬空的工具调用后面紧跟补丁 ToolMessage
+        for msg in messages:
             patched_messages.append(msg)
 
             # 检查是否是带工具调用的 AI 消息
             if msg.type == "ai" and msg.tool_calls:
                 for tool_call in msg.tool_calls:
-                    # 查找对应的ToolMessage
-                    corresponding_tool_msg = next(
-                        (
-                            m for m in messages[i:] 
-                            if m.type == "tool" and m.tool_call_id == tool_call["id"]
-                        ),
-                        None,
-                    )
-
-                    # 如果没找到对应的 ToolMessage，说明是悬空调用
-                    if corresponding_tool_msg is None:
+                    # 如果没有对应的 ToolMessage，说明是悬空调用
+                    if tool_call["id"] not in answered_ids:
                         # 创建一个 ToolMessage 来表示悬空工具调用
                         tool_msg = (
                             f"Tool call {tool_call['name']} with id {tool_call['id']} was "
@@ -55,7 +59,9 @@ class PatchToolCallsMiddleware(AgentMiddleware):
                         patched_messages.append(
                             ToolMessage(
                                 content=tool_msg,
+                                name=tool_call["name"],
+                                tool_call_id=tool_call["id"],
                             )
                         )
-        # 返回更新后的消息列表
+        # 悬空调用的补丁必须插在对应 AIMessage 之后，只能整体覆盖
         return {"messages": Overwrite(patched_messages)}
@@ -0,0 +1,38 @@
+"""控制模型单轮是否并行发出多个工具调用"""
+from collections.abc import Awaitable, Callable
+
+from langchain.agents.middleware.types import AgentMiddleware, ModelRequest, ModelResponse
+
+
+class SequentialToolCallsMiddleware(AgentMiddleware):
+    """禁用并行工具调用的中间件
+
+    create_agent 会把同一条 AIMessage 中的多个工具调用各自作为一个 Send
+    分发到 tools 节点，在同一步内并发执行（异步时相当于 asyncio.gather）。
+    当工具之间存在先后依赖、或需要严格串行时，使用此中间件让模型
+    每轮最多只发出一个工具调用（parallel_tool_calls=False）。
+    """
+
+    def _override(self, request: ModelRequest) -> ModelRequest:
+        # 没有工具时不能传 parallel_tool_calls（OpenAI 会拒绝该参数）
+        if not request.tools:
+            return request
+        return request.override(
+            model_settings={**request.model_settings, "parallel_tool_calls": False}
+        )
+
+    def wrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], ModelResponse],
+    ) -> ModelResponse:
+        """在模型调用前关闭并行工具调用"""
+        return handler(self._override(request))
+
+    async def awrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], Awaitable[ModelResponse]],
+    ) -> ModelResponse:
+        """异步版本"""
+        return await handler(self._override(request))
@@ -0,0 +1,237 @@
+"""CompositeBackend 单元测试"""
+
+import contextvars
+import threading
+import time
+from functools import partial
+from types import SimpleNamespace
+
+import pytest
+
+from langgraph.store.memory import InMemoryStore
+
+from my_deepagents.backends.composite import (
+    _FANOUT_MAX_WORKERS,
+    CompositeBackend,
+    _fan_out,
+)
+from my_deepagents.backends.filesystem import FilesystemBackend
+from my_deepagents.backends.state import StateBackend
+from my_deepagents.backends.store import StoreBackend
+
+
+def _runtime(files=None, store=None):
+    return SimpleNamespace(state={"files": files or {}}, store=store, config={}, tool_call_id="t1")
+
+
+def _fs(path):
+    path.mkdir(parents=True, exist_ok=True)
+    return FilesystemBackend(root_dir=path, virtual_mode=True)
+
+
+# ============================================================
+# 路由匹配
+# ============================================================
+
+def _resolve_by_scan(composite, key):
+    """参照实现: 按前缀长度从长到短线性扫描"""
+    for prefix, backend in composite.sorted_routes:
+        if key.startswith(prefix):
+            suffix = key[len(prefix):]
+            return backend, "/" + suffix if suffix else "/"
+    return composite.default, key
+
+
+def test_route_matching_uses_longest_prefix():
+    """测试: 前缀树匹配与线性扫描一致，嵌套路由取最长前缀"""
+    backends = {name: StateBackend(_runtime()) for name in ["default", "a", "ab", "abc", "other", "odd"]}
+    composite = CompositeBackend(
+        default=backends["default"],
+        routes={
+            "/a/": backends["a"],
+            "/a/b/": backends["ab"],
+            "/a/b/c/": backends["abc"],
+            "/other/": backends["other"],
+            "odd": backends["odd"],
+        },
+    )
+    keys = [
+        "/", "/a", "/a/", "/a/x", "/a/b", "/a/b/", "/a/b/x.txt", "/a/b/c", "/a/b/c/", "/a/b/c/d/e",
+        "/ab/x", "/other/f", "/others/f", "odd", "oddity", "/x/a/b/",
+    ]
+
+    for key in keys:
+        assert composite._get_backend_and_key(key) == _resolve_by_scan(composite, key), key
+
+
+# ============================================================
+# ls_info / glob_info
+# ============================================================
+
+def test_ls_root_returns_fresh_route_entries(tmp_path):
+    """测试: 根目录列表中的路由目录项每次新建，修改返回结果不影响后续调用"""
+    composite = CompositeBackend(default=_fs(tmp_path / "a"), routes={"/b/": _fs(tmp_path / "b")})
+    composite.write("/x.txt", "x")
+
+    first = composite.ls_info("/")
+    assert [(fi["path"], fi["is_dir"]) for fi in first] == [("/b/", True), ("/x.txt", False)]
+    first[0]["path"] = "/changed/"
+
+    assert [fi["path"] for fi in composite.ls_info("/")] == ["/b/", "/x.txt"]
+
+
+def test_glob_does_not_modify_backend_results(tmp_path):
+    """测试: 添加路由前缀时不修改后端返回的 FileInfo（后端缓存结果时不会重复叠加前缀）"""
+
+    class _CachingBackend(StateBackend):
+        def __init__(self):
+            super().__init__(_runtime())
+            self.infos = [{"path": "/f.py", "is_dir": False, "size": 1, "modified_at": ""}]
+
+        def glob_info(self, pattern, path="/"):
+            return self.infos
+
+    cached = _CachingBackend()
+    composite = CompositeBackend(default=_fs(tmp_path / "a"), routes={"/c/": cached})
+
+    for _ in range(2):
+        assert [fi["path"] for fi in composite.glob_info("*.py", "/c/")] == ["/c/f.py"]
+        assert [fi["path"] for fi in composite.glob_info("*.py")] == ["/c/f.py"]
+    assert cached.infos[0]["path"] == "/f.py"
+
+
+# ============================================================
+# copy_files
+# ============================================================
+
+def test_copy_files_between_filesystem_routes(tmp_path):
+    """测试: 两个 FilesystemBackend 路由之间复制"""
+    composite = CompositeBackend(default=_fs(tmp_path / "a"), routes={"/b/": _fs(tmp_path / "b")})
+    data = bytes(range(256)) * 4096
+    composite.upload_files([("/src.bin", data)])
+
+    result = composite.copy_files([("/src.bin", "/b/x/copy.bin")])
+
+    assert [(r.path, r.error) for r in result] == [("/b/x/copy.bin", None)]
+    assert (tmp_path / "b" / "x" / "copy.bin").read_bytes() == data
+    assert (tmp_path / "a" / "src.bin").read_bytes() == data
+
+
+def test_copy_files_overwrites_existing_target(tmp_path):
+    """测试: 目标已存在时被完整覆盖（不残留旧内容）"""
+    composite = CompositeBackend(default=_fs(tmp_path / "a"), routes={"/b/": _fs(tmp_path / "b")})
+    composite.upload_files([("/src.txt", b"new"), ("/b/dst.txt", b"old old old")])
+
+    result = composite.copy_files([("/src.txt", "/b/dst.txt")])
+
+    assert result[0].error is None
+    assert (tmp_path / "b" / "dst.txt").read_bytes() == b"new"
+
+
+def test_copy_files_onto_itself_keeps_content(tmp_path):
+    """测试: 源与目标是同一个文件时不会被截断"""
+    root = tmp_path / "a"
+    composite = CompositeBackend(default=_fs(root), routes={"/alias/": _fs(root)})
+    composite.upload_files([("/a.txt", b"keep me")])
+
+    result = composite.copy_files([("/a.txt", "/a.txt"), ("/a.txt", "/alias/a.txt")])
+
+    assert [r.error for r in result] == [None, None]
+    assert (root / "a.txt").read_bytes() == b"keep me"
+
+
+def test_copy_files_directory_and_missing_source(tmp_path):
+    """测试: 源是目录或不存在时返回错误，且不创建目标"""
+    composite = CompositeBackend(default=_fs(tmp_path / "a"), routes={"/b/": _fs(tmp_path / "b")})
+    (tmp_path / "a" / "dir").mkdir()
+
+    result = composite.copy_files([("/dir", "/b/d"), ("/nope", "/b/n")])
+
+    assert [r.error for r in result] == ["is_directory", "file_not_found"]
+    assert not (tmp_path / "b" / "d").exists()
+    assert not (tmp_path / "b" / "n").exists()
+
+
+def test_copy_files_cross_backend_fallback(tmp_path):
+    """测试: 非 FilesystemBackend 之间经 download_files + upload_files 中转，结果顺序与输入一致"""
+    store = StoreBackend(_runtime(store=InMemoryStore()))
+    composite = CompositeBackend(default=_fs(tmp_path / "a"), routes={"/mem/": store})
+    composite.upload_files([("/mem/m.txt", b"from store"), ("/t.txt", b"from disk")])
+
+    result = composite.copy_files([
+        ("/mem/m.txt", "/copied.txt"),
+        ("/t.txt", "/mem/copied.txt"),
+        ("/mem/none", "/z.txt"),
+    ])
+
+    assert [(r.path, r.error) for r in result] == [
+        ("/copied.txt", None),
+        ("/mem/copied.txt", None),
+        ("/z.txt", "file_not_found"),
+    ]
+    assert (tmp_path / "a" / "copied.txt").read_bytes() == b"from store"
+    assert composite.download_files(["/mem/copied.txt"])[0].content == b"from disk"
+
+
+# ============================================================
+# _fan_out
+# ============================================================
+
+def test_nested_fan_out_does_not_deadlock():
+    """测试: 线程池工作线程内的嵌套扇出串行执行，不会占满线程池后互相等待"""
+    width = _FANOUT_MAX_WORKERS * 2
+
+    def inner():
+        return sum(_fan_out([lambda: 1] * width))
+
+    results = []
+    worker = threading.Thread(target=lambda: results.extend(_fan_out([inner] * width)), daemon=True)
+    worker.start()
+    worker.join(timeout=10)
+
+    assert not worker.is_alive()
+    assert results == [width] * width
+
+
+def test_fan_out_keeps_call_order():
+    """测试: 结果顺序与调用顺序一致，与完成先后无关"""
+    delays = [0.03, 0.0, 0.02, 0.01, 0.0]
+
+    def call(i):
+        time.sleep(delays[i])
+        return i
+
+    assert _fan_out([partial(call, i) for i in range(len(delays))]) == list(range(len(delays)))
+    assert _fan_out([]) == []
+
+
+def test_fan_out_propagates_exception_and_copies_context():
+    """测试: 任一调用抛出的异常传给调用方；线程池中的调用能看到调用方的 contextvars"""
+    var = contextvars.ContextVar("var", default=None)
+    var.set("caller")
+
+    def boom():
+        raise RuntimeError("boom")
+
+    assert _fan_out([var.get, var.get, var.get]) == ["caller"] * 3
+    with pytest.raises(RuntimeError, match="boom"):
+        _fan_out([var.get, boom])
+
+
+def test_grep_returns_first_error_in_route_order(tmp_path):
+    """测试: 多个后端出错时按默认后端、各路由的顺序返回第一个错误"""
+
+    class _Failing(StateBackend):
+        def __init__(self, message):
+            super().__init__(_runtime())
+            self.message = message
+
+        def grep_raw(self, pattern, path=None, glob=None):
+            return self.message
+
+    default = _fs(tmp_path / "a")
+    x, y = _Failing("error x"), _Failing("error y")
+
+    assert CompositeBackend(default=default, routes={"/x/": x, "/y/": y}).grep_raw("foo") == "error x"
+    assert CompositeBackend(default=default, routes={"/y/": y, "/x/": x}).grep_raw("foo") == "error y"
+    assert CompositeBackend(default=_Failing("error default"), routes={"/x/": x}).grep_raw("foo") == "error default"
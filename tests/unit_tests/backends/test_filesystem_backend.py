@@ -0,0 +1,224 @@
+"""FilesystemBackend 单元测试"""
+
+import os
+import re
+
+import pytest
+
+from my_deepagents.backends.filesystem import (
+    _IO_PARALLEL_THRESHOLD,
+    _STREAM_READ_MIN,
+    FilesystemBackend,
+    _scan_matching_lines,
+)
+from my_deepagents.backends.utils import EMPTY_CONTENT_WARNING, format_content_with_line_numbers
+
+
+def test_virtual_mode_rechecks_root_after_symlink_swap(tmp_path):
+    """虚拟模式：目录被替换为指向根目录外的符号链接后，不能再读到外部文件"""
+    root = tmp_path / "sb"
+    outside = tmp_path / "outside"
+    (root / "d").mkdir(parents=True)
+    outside.mkdir()
+    (root / "d" / "f.txt").write_text("inside")
+    (outside / "f.txt").write_text("SECRET")
+
+    backend = FilesystemBackend(root_dir=root, virtual_mode=True)
+    assert "inside" in backend.read("/d/f.txt")
+
+    (root / "d" / "f.txt").unlink()
+    (root / "d").rmdir()
+    os.symlink(outside, root / "d")
+
+    with pytest.raises(ValueError, match="outside root directory"):
+        backend.read("/d/f.txt")
+
+
+def _backend(root, **kwargs):
+    return FilesystemBackend(root_dir=root, virtual_mode=True, **kwargs)
+
+
+# ============================================================
+# ls_info / glob_info
+# ============================================================
+
+@pytest.fixture
+def tree(tmp_path):
+    """测试用目录树: 含隐藏文件、多层子目录和指向子目录的符号链接"""
+    files = [
+        "a.py", "b.txt", ".hidden.py", "README.md",
+        "src/a.py", "src/b.txt", "src/pkg/c.py", "src/pkg/deep/d.py",
+        ".git/config", "docs/x/y/z.md",
+    ]
+    for name in files:
+        (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / name).write_text(name)
+    os.symlink(tmp_path / "src", tmp_path / "link")
+    return tmp_path
+
+
+def test_ls_info_lists_direct_children(tree):
+    """测试: ls_info 与逐项 stat 的结果一致，目录以 / 结尾且按路径排序"""
+    backend = _backend(tree)
+    expected = sorted(
+        ("/" + p.name + ("/" if p.is_dir() else ""), p.is_dir(), 0 if p.is_dir() else p.stat().st_size)
+        for p in tree.iterdir()
+    )
+
+    result = backend.ls_info("/")
+
+    assert [(fi["path"], fi["is_dir"], fi["size"]) for fi in result] == expected
+    assert [fi["path"] for fi in backend.ls_info("/src")] == ["/src/a.py", "/src/b.txt", "/src/pkg/"]
+    assert backend.ls_info("/missing") == []
+    assert backend.ls_info("/a.py") == []
+
+
+@pytest.mark.parametrize(
+    "pattern",
+    [
+        "*.py", "**/*.py", "README.md", "src/*.py", "src/**/*.py", "*",
+        ".*", "pkg/*", "*/*.py", "c.py", "[ab].py", "?.txt",
+    ],
+)
+@pytest.mark.parametrize("path", ["/", "/src"])
+def test_glob_info_matches_rglob(tree, pattern, path):
+    """测试: glob_info 与 Path.rglob 的匹配结果一致（不进入符号链接目录）"""
+    base = tree if path == "/" else tree / "src"
+    expected = sorted(
+        "/" + str(m.relative_to(tree))
+        for m in base.rglob(pattern)
+        if m.is_file() and "link" not in m.relative_to(tree).parts
+    )
+
+    assert [fi["path"] for fi in _backend(tree).glob_info(pattern, path)] == expected
+
+
+def test_glob_info_non_virtual_returns_absolute_paths(tree):
+    """测试: 非虚拟模式返回绝对路径并带有文件大小"""
+    backend = FilesystemBackend(root_dir=tree, virtual_mode=False)
+
+    result = backend.glob_info("*.md", str(tree / "docs"))
+
+    assert [(fi["path"], fi["size"]) for fi in result] == [(str(tree / "docs/x/y/z.md"), len("docs/x/y/z.md"))]
+    assert backend.glob_info("**", "/") == []
+
+
+# ============================================================
+# grep
+# ============================================================
+
+@pytest.mark.parametrize(
+    "pattern",
+    ["foo", "o+", "x?", "", r"\d", "foo|bar", "[a-z]+o", r"o\nb", " ", "ba(r|z)", "."],
+)
+@pytest.mark.parametrize(
+    "content",
+    [
+        "", "foo", "foo\n", "foo\nbar\n\nbaz", "\n\n", "bar\nfoo\nfoo\nfoo", "a1\nb\nc2\n",
+        # 密集匹配：超过 _DENSE_MIN_HITS 后改为逐行处理
+        "x" * 50 + "\n" + "foo\n" * 40,
+    ],
+)
+def test_scan_matching_lines_matches_line_loop(pattern, content):
+    """测试: 整文件扫描与逐行 regex.search 的结果一致"""
+    regex = re.compile(pattern)
+    expected = [(n, line) for n, line in enumerate(content.splitlines(), 1) if regex.search(line)]
+
+    assert _scan_matching_lines(regex, content) == expected
+
+
+# ============================================================
+# read / edit
+# ============================================================
+
+def test_read_streams_large_file(tmp_path):
+    """测试: 超过 1 MiB 的文件按行流式读取，结果与整体读取后切片一致"""
+    lines = [f"line {i} " + "x" * 40 for i in range(30000)]
+    (tmp_path / "big.txt").write_text("\n".join(lines) + "\n")
+    assert (tmp_path / "big.txt").stat().st_size >= _STREAM_READ_MIN
+    backend = _backend(tmp_path)
+
+    expected_middle = format_content_with_line_numbers(lines[100:103], start_line=101)
+    expected_tail = format_content_with_line_numbers(lines[29999:], start_line=30000)
+
+    assert backend.read("/big.txt", offset=100, limit=3) == expected_middle
+    assert backend.read("/big.txt", offset=29999, limit=10) == expected_tail
+    assert backend.read("/big.txt", offset=30000) == "Error: Line offset 30000 exceeds file length (30000 lines)"
+
+
+def test_read_large_blank_file(tmp_path):
+    """测试: 超过 1 MiB 的纯空白文件返回空内容提示"""
+    (tmp_path / "blank.txt").write_text("\n" * _STREAM_READ_MIN)
+
+    assert _backend(tmp_path).read("/blank.txt") == EMPTY_CONTENT_WARNING
+
+
+@pytest.mark.parametrize(
+    ("content", "old", "new", "replace_all", "expected"),
+    [
+        ("head\nold tail\n", "old", "new", False, "head\nnew tail\n"),
+        ("head\nold tail\n", "old", "much longer", False, "head\nmuch longer tail\n"),
+        ("head\nold tail\n", "old tail\n", "", False, "head\n"),
+        ("中文前缀\nold\n", "old", "新", False, "中文前缀\n新\n"),
+        ("a old b old c", "old", "x", True, "a x b x c"),
+        ("a\r\nold\r\n", "old", "new", False, "a\nnew\n"),
+    ],
+)
+def test_edit_rewrites_from_first_match(tmp_path, content, old, new, replace_all, expected):
+    """测试: 只覆写第一处匹配之后的内容，最终文件与整体替换一致"""
+    (tmp_path / "f.txt").write_bytes(content.encode())
+    backend = _backend(tmp_path)
+
+    result = backend.edit("/f.txt", old, new, replace_all=replace_all)
+
+    assert result.error is None
+    assert (tmp_path / "f.txt").read_bytes() == expected.encode()
+
+
+def test_edit_errors_leave_file_unchanged(tmp_path):
+    """测试: 找不到或匹配多处时返回错误，文件不变"""
+    (tmp_path / "f.txt").write_text("dup dup")
+    backend = _backend(tmp_path)
+
+    assert backend.edit("/f.txt", "missing", "x").error is not None
+    assert backend.edit("/f.txt", "dup", "x").error is not None
+    assert backend.edit("/nope.txt", "dup", "x").error == "Error: File '/nope.txt' not found"
+    assert (tmp_path / "f.txt").read_text() == "dup dup"
+
+
+# ============================================================
+# upload_files / download_files
+# ============================================================
+
+def test_upload_and_download_keep_input_order(tmp_path):
+    """测试: 批量上传/下载（走线程池）结果顺序与输入一致，错误按条目返回"""
+    backend = _backend(tmp_path)
+    files = [(f"/dir{i % 3}/f{i}.bin", bytes([i]) * (i * 1000)) for i in range(20)]
+    (tmp_path / "blocker").write_text("")
+    files.append(("/blocker/f.bin", b"x"))
+    assert len(files) >= _IO_PARALLEL_THRESHOLD
+
+    uploaded = backend.upload_files(files)
+
+    assert [r.path for r in uploaded] == [path for path, _ in files]
+    assert [r.error for r in uploaded] == [None] * 20 + ["invalid_path"]
+
+    paths = [path for path, _ in files[:20]] + ["/missing.bin", "/dir0"]
+    downloaded = backend.download_files(paths)
+
+    assert [r.path for r in downloaded] == paths
+    assert [r.content for r in downloaded[:20]] == [content for _, content in files[:20]]
+    assert [r.error for r in downloaded[20:]] == ["file_not_found", "is_directory"]
+
+
+def test_upload_same_path_last_write_wins(tmp_path):
+    """测试: 同一批次中同一文件出现多次时，按输入顺序写入，最后一次生效"""
+    backend = _backend(tmp_path)
+    big = b"1" * (1 << 20)
+    files = [(f"/other{i}.bin", b"x") for i in range(6)] + [("/a", big), ("a", b"2"), ("/d/../a", b"3")]
+
+    for _ in range(20):
+        result = backend.upload_files(files)
+
+        assert [r.error for r in result] == [None] * 7 + [None, "invalid_path"]
+        assert (tmp_path / "a").read_bytes() == b"2"
@@ -0,0 +1,67 @@
+"""StateBackend 单元测试"""
+
+from types import SimpleNamespace
+
+from my_deepagents.backends.state import StateBackend
+from my_deepagents.backends.utils import create_file_data
+
+
+def _backend(files):
+    return StateBackend(SimpleNamespace(state={"files": files}))
+
+
+def _ls_by_scan(files, path):
+    """逐个文件前缀匹配的参考实现"""
+    prefix = path if path.endswith("/") else path + "/"
+    entries = set()
+    for key in files:
+        if not key.startswith(prefix):
+            continue
+        head, sep, _ = key[len(prefix):].partition("/")
+        entries.add((prefix + head + "/", True) if sep else (key, False))
+    return sorted(entries)
+
+
+def test_ls_info_matches_prefix_scan():
+    """测试: ls_info 与逐个前缀匹配的参考实现一致（包括同名文件与目录、空路径段）"""
+    files = {
+        key: create_file_data("x")
+        for key in ["/a", "/a/b.txt", "/a/c/d.py", "/a//e", "/top.md", "/a/", "rel/x"]
+    }
+    backend = _backend(files)
+    for path in ["/", "/a", "/a/", "/a/c", "/a//", "/missing/", "rel", ""]:
+        got = [(info["path"], info["is_dir"]) for info in backend.ls_info(path)]
+        assert got == _ls_by_scan(files, path), path
+
+
+def test_ls_info_sizes_and_dirs():
+    """测试: 文件带大小，目录以 / 结尾且 size 为 0"""
+    backend = _backend({"/src/main.py": create_file_data("ab\ncd"), "/src/pkg/m.py": create_file_data("")})
+    infos = backend.ls_info("/src/")
+    assert [(i["path"], i["is_dir"], i["size"]) for i in infos] == [
+        ("/src/main.py", False, 5),
+        ("/src/pkg/", True, 0),
+    ]
+    assert infos[0]["modified_at"] and infos[1]["modified_at"] == ""
+
+
+def test_ls_info_sees_in_place_changes():
+    """测试: files 被原地修改（文件数不变）后，ls_info 反映最新内容"""
+    files = {"/a.txt": create_file_data("a"), "/b.txt": create_file_data("b")}
+    backend = _backend(files)
+    assert [i["path"] for i in backend.ls_info("/")] == ["/a.txt", "/b.txt"]
+
+    del files["/b.txt"]
+    files["/c/d.txt"] = create_file_data("c")
+
+    assert [i["path"] for i in backend.ls_info("/")] == ["/a.txt", "/c/"]
+
+
+def test_missing_files_channel():
+    """测试: 状态中还没有 files 时各操作正常返回"""
+    backend = StateBackend(SimpleNamespace(state={}))
+    assert backend.ls_info("/") == []
+    assert backend.glob_info("*") == []
+    assert backend.grep_raw("x") == []
+    assert "not found" in backend.read("/x")
+    assert backend.write("/x", "a").files_update["/x"]["content"] == ["a"]
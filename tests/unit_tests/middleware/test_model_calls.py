@@ -0,0 +1,122 @@
+"""模型调用相关中间件单元测试: SequentialToolCallsMiddleware 与 ModelConcurrencyMiddleware"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from langchain.agents.middleware.types import ModelRequest
+from langchain_core.language_models.fake_chat_models import FakeMessagesListChatModel
+from langchain_core.messages import AIMessage
+
+from my_deepagents.middleware.model_concurrency import ModelConcurrencyMiddleware
+from my_deepagents.middleware.sequential_tool_calls import SequentialToolCallsMiddleware
+
+
+def _request(tools=None, model_settings=None):
+    return ModelRequest(
+        model=FakeMessagesListChatModel(responses=[AIMessage(content="ok")]),
+        messages=[],
+        tools=tools or [],
+        model_settings=model_settings or {},
+    )
+
+
+_TOOL = {"type": "function", "function": {"name": "ls", "parameters": {}}}
+
+
+# ============================================================
+# SequentialToolCallsMiddleware
+# ============================================================
+
+def test_sequential_disables_parallel_tool_calls():
+    """测试: 有工具时关闭 parallel_tool_calls，并保留其他模型参数"""
+    seen = []
+
+    SequentialToolCallsMiddleware().wrap_model_call(_request([_TOOL], {"temperature": 0}), seen.append)
+
+    assert seen[0].model_settings == {"temperature": 0, "parallel_tool_calls": False}
+
+
+def test_sequential_leaves_requests_without_tools():
+    """测试: 没有工具时不传 parallel_tool_calls"""
+    request = _request()
+    seen = []
+
+    SequentialToolCallsMiddleware().wrap_model_call(request, seen.append)
+
+    assert seen == [request]
+
+
+async def test_sequential_async():
+    """测试: 异步版本同样关闭 parallel_tool_calls"""
+    seen = []
+
+    async def handler(request):
+        seen.append(request)
+
+    await SequentialToolCallsMiddleware().awrap_model_call(_request([_TOOL]), handler)
+
+    assert seen[0].model_settings == {"parallel_tool_calls": False}
+
+
+# ============================================================
+# ModelConcurrencyMiddleware
+# ============================================================
+
+def test_concurrency_rejects_invalid_limit():
+    """测试: 上限小于 1 时报错"""
+    with pytest.raises(ValueError, match="max_concurrency must be >= 1"):
+        ModelConcurrencyMiddleware(0)
+
+
+async def test_concurrency_limits_async_calls():
+    """测试: 异步调用同时进行的数量不超过上限，结果原样返回"""
+    middleware = ModelConcurrencyMiddleware(2)
+    stats = {"running": 0, "peak": 0}
+
+    async def handler(request):
+        stats["running"] += 1
+        stats["peak"] = max(stats["peak"], stats["running"])
+        await asyncio.sleep(0.01)
+        stats["running"] -= 1
+        return "done"
+
+    results = await asyncio.gather(*(middleware.awrap_model_call(_request(), handler) for _ in range(6)))
+
+    assert results == ["done"] * 6
+    assert stats["peak"] == 2
+
+
+def test_concurrency_limits_sync_calls():
+    """测试: 多个线程中的同步调用共享同一个上限"""
+    middleware = ModelConcurrencyMiddleware(2)
+    lock = threading.Lock()
+    stats = {"running": 0, "peak": 0}
+
+    def handler(request):
+        with lock:
+            stats["running"] += 1
+            stats["peak"] = max(stats["peak"], stats["running"])
+        time.sleep(0.01)
+        with lock:
+            stats["running"] -= 1
+
+    threads = [threading.Thread(target=middleware.wrap_model_call, args=(_request(), handler)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert stats["peak"] == 2
+
+
+def test_concurrency_separate_event_loops():
+    """测试: 同一个实例可以在先后创建的多个事件循环中使用"""
+    middleware = ModelConcurrencyMiddleware(1)
+
+    async def handler(request):
+        return "done"
+
+    for _ in range(2):
+        assert asyncio.run(middleware.awrap_model_call(_request(), handler)) == "done"
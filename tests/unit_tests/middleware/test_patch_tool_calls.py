@@ -0,0 +1,46 @@
+"""PatchToolCallsMiddleware 单元测试"""
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.types import Overwrite
+
+from my_deepagents.middleware.patch_tool_calls import PatchToolCallsMiddleware
+
+
+def _ai(*call_ids):
+    return AIMessage(content="", tool_calls=[{"name": "ls", "args": {}, "id": call_id} for call_id in call_ids])
+
+
+def test_no_update_without_dangling_calls():
+    """测试: 没有悬空工具调用时不返回任何更新"""
+    middleware = PatchToolCallsMiddleware()
+    messages = [HumanMessage(content="hi"), _ai("c1"), ToolMessage(content="ok", tool_call_id="c1")]
+
+    assert middleware.before_agent({"messages": []}, None) is None
+    assert middleware.before_agent({"messages": messages}, None) is None
+
+
+def test_patches_dangling_calls_after_their_message():
+    """测试: 悬空调用的补丁 ToolMessage 紧跟在对应 AIMessage 之后，已响应的调用不补"""
+    middleware = PatchToolCallsMiddleware()
+    messages = [
+        HumanMessage(content="hi"),
+        _ai("c1", "c2"),
+        ToolMessage(content="ok", tool_call_id="c2"),
+        HumanMessage(content="again"),
+        _ai("c3"),
+    ]
+
+    update = middleware.before_agent({"messages": messages}, None)
+
+    assert isinstance(update["messages"], Overwrite)
+    patched = update["messages"].value
+    assert [(m.type, getattr(m, "tool_call_id", None)) for m in patched] == [
+        ("human", None),
+        ("ai", None),
+        ("tool", "c1"),
+        ("tool", "c2"),
+        ("human", None),
+        ("ai", None),
+        ("tool", "c3"),
+    ]
+    assert "cancelled" in patched[2].content
@@ -0,0 +1,225 @@
+"""检查点保存器单元测试"""
+
+import sqlite3
+from typing import Annotated, TypedDict
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import END, START, StateGraph
+from langgraph.graph.message import add_messages
+
+from my_deepagents.checkpoint import PREFIX_TYPE, PrefixCacheSaver, TieredBlobStore, TieredCheckpointer
+
+
+class _State(TypedDict):
+    messages: Annotated[list, add_messages]
+    todos: list[dict]
+
+
+def _echo(state: _State) -> dict:
+    last = state["messages"][-1]
+    return {"messages": [AIMessage(content=f"echo: {last.content}")], "todos": [{"n": len(state["messages"])}]}
+
+
+def _graph(checkpointer):
+    builder = StateGraph(_State)
+    builder.add_node("echo", _echo)
+    builder.add_edge(START, "echo")
+    builder.add_edge("echo", END)
+    return builder.compile(checkpointer=checkpointer)
+
+
+def _config(thread_id: str) -> dict:
+    return {"configurable": {"thread_id": thread_id}}
+
+
+# ============================================================
+# PrefixCacheSaver
+# ============================================================
+
+def test_prefix_cache_round_trip():
+    """测试: put/get/list 往返后的状态与 InMemorySaver 一致，只有 messages 按前缀链存储"""
+    saver = PrefixCacheSaver()
+    graph = _graph(saver)
+    reference = _graph(InMemorySaver())
+    for text in ["a", "b"]:
+        for g in (graph, reference):
+            g.invoke({"messages": [HumanMessage(content=text, id=text)]}, _config("t1"))
+
+    state = graph.get_state(_config("t1"))
+    assert [m.content for m in state.values["messages"]] == ["a", "echo: a", "b", "echo: b"]
+    assert state.values["todos"] == [{"n": 3}]
+
+    history = [s.values for s in graph.get_state_history(_config("t1"))]
+    expected = [s.values for s in reference.get_state_history(_config("t1"))]
+    assert _contents(history) == _contents(expected)
+
+    typs = {key[2]: blob[0] for key, blob in saver.blobs.items() if blob[0] != "empty"}
+    assert typs["messages"] == PREFIX_TYPE
+    assert typs["todos"] != PREFIX_TYPE
+
+
+def test_prefix_cache_shares_history():
+    """测试: 历史消息在检查点之间只存一份"""
+    saver = PrefixCacheSaver()
+    graph = _graph(saver)
+    for text in ["a", "b", "c"]:
+        graph.invoke({"messages": [HumanMessage(content=text)]}, _config("t1"))
+    # 每条消息一个元素，每个前缀一个节点
+    assert len(saver.serde.items) == 6
+    assert len(saver.serde.prefixes) == 6
+
+
+def test_prefix_cache_serializes_only_new_messages():
+    """测试: 每次写入只序列化上次之后新增的消息，历史前缀直接复用"""
+    saver = PrefixCacheSaver()
+    calls = []
+    dumps = saver.serde.serde.dumps_typed
+
+    def counting_dumps(obj):
+        # 检查点本身和 metadata 也经过同一个序列化器，只记录消息
+        if isinstance(obj, BaseMessage):
+            calls.append(obj)
+        return dumps(obj)
+
+    saver.serde.serde.dumps_typed = counting_dumps
+    messages = [HumanMessage(content=f"m{i}") for i in range(5)]
+    config = {"configurable": {"thread_id": "t1", "checkpoint_ns": ""}}
+
+    config = saver.put(config, _checkpoint("1", messages[:3]), {}, {"messages": 1})
+    assert calls == messages[:3]
+
+    calls.clear()
+    config = saver.put(config, _checkpoint("2", messages), {}, {"messages": 2})
+    assert calls == messages[3:]
+
+    loaded = saver.get_tuple(config).checkpoint["channel_values"]["messages"]
+    assert [m.content for m in loaded] == [m.content for m in messages]
+
+
+def test_prefix_cache_replaced_message_is_persisted():
+    """测试: 历史中的消息被替换（如 add_messages 按 id 替换）后，读回的是新内容"""
+    saver = PrefixCacheSaver()
+    first = [HumanMessage(content="a", id="m1"), HumanMessage(content="before", id="m2")]
+    config = saver.put(
+        {"configurable": {"thread_id": "t1", "checkpoint_ns": ""}},
+        _checkpoint("1", first),
+        {},
+        {"messages": 1},
+    )
+    second = add_messages(first, [HumanMessage(content="after", id="m2"), HumanMessage(content="c", id="m3")])
+    config = saver.put(config, _checkpoint("2", second), {}, {"messages": 2})
+
+    loaded = saver.get_tuple(config).checkpoint["channel_values"]["messages"]
+    assert [m.content for m in loaded] == ["a", "after", "c"]
+
+
+def test_prefix_cache_delete_thread_prunes_unreferenced():
+    """测试: delete_thread 回收只被该线程引用的消息，共享前缀保留"""
+    saver = PrefixCacheSaver()
+    graph = _graph(saver)
+    graph.invoke({"messages": [HumanMessage(content="same", id="h")]}, _config("t1"))
+    graph.invoke({"messages": [HumanMessage(content="same", id="h")]}, _config("t2"))
+    graph.invoke({"messages": [HumanMessage(content="only t1")]}, _config("t1"))
+    before = len(saver.serde.items)
+
+    saver.delete_thread("t1")
+    assert len(saver.serde.items) < before
+    assert [m.content for m in graph.get_state(_config("t2")).values["messages"]] == ["same", "echo: same"]
+
+    saver.delete_thread("t2")
+    assert saver.serde.items == {}
+    assert saver.serde.prefixes == {}
+
+
+def _contents(values_list: list[dict]) -> list:
+    return [
+        ([m.content for m in values.get("messages", [])], values.get("todos"))
+        for values in values_list
+    ]
+
+
+def _checkpoint(checkpoint_id: str, messages: list) -> dict:
+    return {
+        "v": 1,
+        "id": checkpoint_id,
+        "ts": "2025-01-01T00:00:00+00:00",
+        "channel_values": {"messages": messages},
+        "channel_versions": {"messages": int(checkpoint_id)},
+        "versions_seen": {},
+        "pending_sends": [],
+    }
+
+
+# ============================================================
+# TieredCheckpointer
+# ============================================================
+
+def _blob(n: int) -> tuple[str, bytes]:
+    return ("bytes", bytes([n]) * 100)
+
+
+def test_tiered_store_spills_and_promotes():
+    """测试: 超过内存上限的最旧条目写入磁盘，读取时提升回内存"""
+    store = TieredBlobStore(None, capacity_bytes=250)
+    try:
+        for i in range(4):
+            store[("t", "", "c", i)] = _blob(i)
+        assert list(store._hot) == [("t", "", "c", 2), ("t", "", "c", 3)]
+        assert len(store) == 4
+
+        assert store[("t", "", "c", 0)] == _blob(0)
+        assert ("t", "", "c", 0) in store._hot
+        assert ("t", "", "c", 2) not in store._hot
+        assert sorted(store) == [("t", "", "c", i) for i in range(4)]
+
+        del store[("t", "", "c", 1)]
+        assert ("t", "", "c", 1) not in store
+        assert len(store) == 3
+    finally:
+        store.close()
+
+
+def test_tiered_store_instances_are_isolated(tmp_path):
+    """测试: 共用同一个数据库文件的两个实例看不到对方的溢出数据，close 时删除自己的数据"""
+    path = tmp_path / "blobs.sqlite"
+    first = TieredBlobStore(path, capacity_bytes=0)
+    second = TieredBlobStore(path, capacity_bytes=0)
+    for store in (first, second):
+        store[("t", "", "c", 1)] = _blob(1)
+        store[("t", "", "c", 2)] = _blob(2)
+
+    first.close()
+    assert len(second) == 2
+    assert second[("t", "", "c", 1)] == _blob(1)
+    second.close()
+
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT COUNT(*) FROM spilled_blobs").fetchone() == (0,)
+    conn.close()
+
+
+def test_tiered_store_temp_file_removed_on_close():
+    """测试: 默认的临时数据库文件在 close 时删除"""
+    store = TieredBlobStore(None, capacity_bytes=0)
+    assert store.path.exists()
+    store.close()
+    store.close()
+    assert not store.path.exists()
+
+
+def test_tiered_checkpointer_round_trip_and_delete_thread():
+    """测试: 数据溢出到磁盘后状态读取正确，delete_thread 同时删除磁盘上的数据"""
+    with TieredCheckpointer(capacity_bytes=0) as saver:
+        graph = _graph(saver)
+        for text in ["a", "b"]:
+            graph.invoke({"messages": [HumanMessage(content=text)]}, _config("t1"))
+        graph.invoke({"messages": [HumanMessage(content="x")]}, _config("t2"))
+
+        values = graph.get_state(_config("t1")).values
+        assert [m.content for m in values["messages"]] == ["a", "echo: a", "b", "echo: b"]
+
+        saver.delete_thread("t1")
+        assert all(key[0] == "t2" for key in saver.blobs)
+        assert graph.get_state(_config("t1")).values == {}
+        assert [m.content for m in graph.get_state(_config("t2")).values["messages"]] == ["x", "echo: x"]
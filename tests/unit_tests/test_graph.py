@@ -0,0 +1,100 @@
+"""graph 模块单元测试"""
+
+import asyncio
+from typing import Annotated, TypedDict
+
+from langchain_core.language_models.fake_chat_models import FakeMessagesListChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import END, START, StateGraph
+from langgraph.graph.message import add_messages
+
+from my_deepagents.graph import AGENT_CACHE_SIZE, arun_batch, create_deep_agent_cached
+
+
+def _model():
+    return FakeMessagesListChatModel(responses=[AIMessage(content="ok")])
+
+
+# ============================================================
+# create_deep_agent_cached
+# ============================================================
+
+def test_create_deep_agent_cached_reuses_agent():
+    """测试: 参数相同（对象为同一实例）时返回同一个编译结果"""
+    model = _model()
+
+    first = create_deep_agent_cached(model, system_prompt="a", subagents=[])
+    second = create_deep_agent_cached(model, system_prompt="a", subagents=[])
+
+    assert first is second
+
+
+def test_create_deep_agent_cached_distinguishes_arguments():
+    """测试: 参数值不同或对象不是同一实例时分别创建"""
+    model = _model()
+    agent = create_deep_agent_cached(model, system_prompt="a")
+
+    assert create_deep_agent_cached(model, system_prompt="b") is not agent
+    assert create_deep_agent_cached(_model(), system_prompt="a") is not agent
+    assert create_deep_agent_cached(model, system_prompt="a", parallel_tools=False) is not agent
+
+
+def test_create_deep_agent_cached_evicts_least_recent():
+    """测试: 超过缓存上限后淘汰最久未使用的代理"""
+    model = _model()
+    first = create_deep_agent_cached(model, system_prompt="prompt 0")
+    for i in range(1, AGENT_CACHE_SIZE + 1):
+        create_deep_agent_cached(model, system_prompt=f"prompt {i}")
+
+    assert create_deep_agent_cached(model, system_prompt="prompt 0") is not first
+
+
+# ============================================================
+# arun_batch
+# ============================================================
+
+class _State(TypedDict):
+    messages: Annotated[list, add_messages]
+
+
+def _counting_agent(stats):
+    """每次调用记录同时运行的会话数，并回显本会话收到的消息数"""
+
+    async def _reply(state: _State) -> dict:
+        stats["running"] += 1
+        stats["peak"] = max(stats["peak"], stats["running"])
+        await asyncio.sleep(0.01)
+        stats["running"] -= 1
+        return {"messages": [AIMessage(content=str(len(state["messages"])))]}
+
+    graph = StateGraph(_State)
+    graph.add_node("reply", _reply)
+    graph.add_edge(START, "reply")
+    graph.add_edge("reply", END)
+    return graph.compile(checkpointer=InMemorySaver())
+
+
+async def test_arun_batch_keeps_order_and_threads():
+    """测试: 结果顺序与输入一致，各会话的检查点状态互不干扰"""
+    agent = _counting_agent({"running": 0, "peak": 0})
+    items = [{"input": {"messages": [HumanMessage(content=f"q{i}")]}, "thread_id": f"t{i}"} for i in range(5)]
+
+    results = await arun_batch(agent, items)
+
+    assert [[m.content for m in r["messages"]] for r in results] == [[f"q{i}", "1"] for i in range(5)]
+    for i in range(5):
+        state = await agent.aget_state({"configurable": {"thread_id": f"t{i}"}})
+        assert [m.content for m in state.values["messages"]] == [f"q{i}", "1"]
+
+
+async def test_arun_batch_limits_concurrency():
+    """测试: 同时运行的会话数不超过 max_concurrency"""
+    stats = {"running": 0, "peak": 0}
+    agent = _counting_agent(stats)
+    items = [{"input": {"messages": [HumanMessage(content="q")]}, "thread_id": f"t{i}"} for i in range(10)]
+
+    results = await arun_batch(agent, items, max_concurrency=3)
+
+    assert len(results) == 10
+    assert 1 < stats["peak"] <= 3